@@ -0,0 +1,75 @@
+
+"""Concurrent request throughput: sync Session vs AsyncSession inside async handlers.
+
+Each simulated request looks up one service, the way GET /api/services/{id}
+does. The sync variant blocks the event loop for every round trip, so
+concurrent requests serialize; the async variant overlaps them.
+
+Run from python_backend/ against the configured DATABASE_URL (PostgreSQL
+shows the network effect best):
+    python -m benchmarks.async_db_benchmark [requests] [concurrency]
+"""
+import asyncio
+import sys
+import time
+
+from sqlalchemy import select
+from database.connection import get_engine, Base, SessionLocal, AsyncSessionLocal, dispose_engines
+from models.service import Service
+
+async def sync_lookup(service_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(Service).filter(Service.id == service_id, Service.is_active == True).first()
+    finally:
+        db.close()
+
+async def async_lookup(service_id: int):
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Service).where(Service.id == service_id, Service.is_active == True))
+
+async def drive(lookup, service_id: int, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await lookup(service_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+def seed_service() -> int:
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        service = db.query(Service).first()
+        if service is None:
+            service = Service(
+                title="Benchmark Hotel", type="hotel", location="MG Road", city="Mumbai",
+                state="Maharashtra", price_per_person=2500, availability=10, rating=4.2
+            )
+            db.add(service)
+            db.commit()
+        return service.id
+    finally:
+        db.close()
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    service_id = seed_service()
+
+    # Warm both pools before timing
+    await drive(sync_lookup, service_id, concurrency, concurrency)
+    await drive(async_lookup, service_id, concurrency, concurrency)
+
+    sync_rps = await drive(sync_lookup, service_id, requests, concurrency)
+    async_rps = await drive(async_lookup, service_id, requests, concurrency)
+    print(f"{requests} requests, concurrency {concurrency}")
+    print(f"sync Session:  {sync_rps:10.1f} req/s")
+    print(f"AsyncSession:  {async_rps:10.1f} req/s  ({async_rps / sync_rps:.2f}x)")
+    await dispose_engines()
+
+if __name__ == "__main__":
+    asyncio.run(main())
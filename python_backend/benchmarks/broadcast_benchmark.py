@@ -0,0 +1,58 @@
+
+"""Availability broadcast latency with many subscribers on the local backend.
+
+Every subscriber runs a consumer task like an SSE connection does. Each
+round publishes one event and measures how long subscribers take to
+receive it: median and p99 per subscriber, and when the last one got it.
+
+Run from python_backend/:  python -m benchmarks.broadcast_benchmark [subscribers] [rounds]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from services.availability_events import AvailabilityBroker
+
+async def consume(subscription, rounds: int, received: list):
+    for _ in range(rounds):
+        await subscription.get()
+        received.append(time.perf_counter())
+
+async def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    broker = AvailabilityBroker("local")
+    await broker.start()
+
+    # A hot service everyone watches, as during a sale
+    received = []
+    consumers = [
+        asyncio.create_task(consume(broker.subscribe([1]), rounds, received))
+        for _ in range(subscribers)
+    ]
+    await asyncio.sleep(0)
+
+    latencies, fanout = [], []
+    for available in range(rounds):
+        received.clear()
+        start = time.perf_counter()
+        await broker.publish([{"service_id": 1, "date": "2026-12-31", "available": available}])
+        publish_done = time.perf_counter()
+        while len(received) < subscribers:
+            await asyncio.sleep(0)
+        latencies.extend((t - start) * 1000 for t in received)
+        fanout.append(((publish_done - start) * 1000, (max(received) - start) * 1000))
+
+    await asyncio.gather(*consumers)
+    await broker.stop()
+
+    latencies.sort()
+    print(f"{subscribers:,} subscribers, {rounds} events")
+    print(f"publish (enqueue to all)  median {statistics.median(f[0] for f in fanout):8.2f} ms")
+    print(f"last subscriber received  median {statistics.median(f[1] for f in fanout):8.2f} ms")
+    print(f"per-subscriber latency    p50 {latencies[len(latencies) // 2]:8.2f} ms"
+          f"   p99 {latencies[int(len(latencies) * 0.99)]:8.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""EXPLAIN-based regression check for the hot query paths.
+
+Asserts the planner uses the intended index for the statements that
+search_services, get_user_bookings and the booking lookups run, built by
+the same helpers the routes use, so a change to a route's query shape is
+checked too. The planner keeps its normal settings, which means the tables
+need realistic data: --seed resets the database and loads the load test's
+synthetic data first. Exits non-zero on any regression, so it can gate CI.
+
+Run from python_backend/ against a scratch database:
+    python -m benchmarks.explain_check --seed
+    DATABASE_URL=postgresql://localhost/travelgo_explain python -m benchmarks.explain_check --seed
+"""
+import argparse
+import asyncio
+import random
+import sys
+from sqlalchemy import func, select
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--seed", action="store_true", help="reset the database and load synthetic data first")
+    parser.add_argument("--services", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=50000)
+    return parser.parse_args()
+
+async def build_checks(user_id: str, city: str):
+    """(name, statement, index the plan must mention, by dialect)"""
+    from database.connection import AsyncSessionLocal
+    from models.booking import Booking
+    from routes.bookings import build_history_statement, user_booking_statement
+    from routes.services import build_search_statement
+
+    async with AsyncSessionLocal() as db:
+        search, _ = await build_search_statement(db, None, city, None, "hotel", None, None, 4)
+        price, _ = await build_search_statement(db, None, None, None, None, 1000, 1050, None)
+        destination, _ = await build_search_statement(db, city[:-1], None, None, None, None, None, None)
+        last_id = await db.scalar(select(func.max(Booking.id)).where(Booking.user_id == user_id))
+        booking_id = await db.scalar(select(func.min(Booking.id)).where(Booking.user_id == user_id))
+
+    # Page sizes as the routes request them: limit + 1
+    return [
+        ("search_services type+city+rating", search.limit(21), {"default": "ix_services_search"}),
+        ("search_services price range", price.limit(21), {"default": "ix_services_price"}),
+        # SQLite resolves destinations in process and looks the ids up by key
+        ("search_services destination", destination.limit(21),
+         {"postgresql": "_trgm", "default": "PRIMARY KEY"}),
+        ("get_user_bookings", build_history_statement(user_id).limit(21), {"default": "ix_bookings_user_created"}),
+        ("get_user_bookings next page with services",
+         build_history_statement(user_id, {"confirmed"}, include_service=True, cursor_id=last_id).limit(21),
+         {"default": "ix_bookings_user_created"}),
+        ("get_booking by id and user", user_booking_statement(booking_id, user_id),
+         {"postgresql": "bookings_pkey", "default": "PRIMARY KEY"}),
+    ]
+
+def explain(connection, stmt) -> str:
+    # Expanding IN lists (e.g. booking statuses) are rendered as plain parameters
+    compiled = stmt.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    if connection.dialect.name == "postgresql":
+        rows = connection.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params)
+    else:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params)
+    return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+def main() -> int:
+    args = parse_args()
+    from database.connection import get_engine
+    from database.migrations import run_migrations
+    from models.booking import Booking
+    from models.service import Service
+
+    if args.seed:
+        from benchmarks.load_test import reset_database, seed
+        print(f"Seeding {args.services:,} services, {args.users:,} users, {args.bookings:,} bookings...")
+        reset_database()
+        seed(args, random.Random(42))
+    else:
+        run_migrations()
+
+    with get_engine().begin() as connection:
+        # Plans depend on statistics; make sure they reflect the data
+        connection.exec_driver_sql("ANALYZE")
+        user_id = connection.scalar(select(Booking.user_id).group_by(Booking.user_id)
+                                    .order_by(func.count().desc()).limit(1))
+        city = connection.scalar(select(Service.city).group_by(Service.city)
+                                 .order_by(func.count().desc()).limit(1))
+    if user_id is None or city is None:
+        print("No services or bookings to plan against; run with --seed on a scratch database")
+        return 1
+
+    failures = 0
+    with get_engine().connect() as connection:
+        for name, stmt, expected in asyncio.run(build_checks(user_id, city)):
+            index = expected.get(connection.dialect.name, expected["default"])
+            plan = explain(connection, stmt)
+            ok = index in plan
+            failures += not ok
+            print(f"[{'ok' if ok else 'FAIL'}] {name}: expects {index}")
+            if not ok:
+                print("    " + plan.replace("\n", "\n    "))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
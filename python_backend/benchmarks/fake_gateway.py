@@ -0,0 +1,62 @@
+
+"""Local stand-in for the Razorpay REST API.
+
+Latency and failure rate are adjustable at runtime, so payment flows can be
+load-tested offline, including slow-gateway and outage scenarios:
+
+    uvicorn benchmarks.fake_gateway:app --port 9100
+    RAZORPAY_BASE_URL=http://127.0.0.1:9100/v1 RAZORPAY_KEY=fake PAYMENT_MOCK_FALLBACK=false python main.py
+
+    curl -X POST 'http://127.0.0.1:9100/_scenario?latency_ms=800&error_rate=0.2'
+"""
+import asyncio
+import os
+import random
+import uuid
+from fastapi import FastAPI, HTTPException, Request
+
+app = FastAPI(title="Fake Razorpay")
+
+scenario = {
+    "latency_ms": float(os.getenv("FAKE_GATEWAY_LATENCY_MS", "50")),
+    "error_rate": float(os.getenv("FAKE_GATEWAY_ERROR_RATE", "0")),
+}
+orders = {}
+stats = {"requests": 0, "errors": 0}
+
+async def simulate():
+    stats["requests"] += 1
+    await asyncio.sleep(scenario["latency_ms"] / 1000)
+    if random.random() < scenario["error_rate"]:
+        stats["errors"] += 1
+        raise HTTPException(status_code=502, detail="Simulated gateway failure")
+
+@app.post("/_scenario")
+async def set_scenario(latency_ms: float = None, error_rate: float = None):
+    if latency_ms is not None:
+        scenario["latency_ms"] = latency_ms
+    if error_rate is not None:
+        scenario["error_rate"] = error_rate
+    return {**scenario, **stats}
+
+@app.post("/v1/orders")
+async def create_order(request: Request):
+    await simulate()
+    data = await request.json()
+    order_id = f"order_{uuid.uuid4().hex[:14]}"
+    orders[order_id] = data
+    return {"id": order_id, "entity": "order", "amount": data.get("amount"), "currency": data.get("currency"), "status": "created"}
+
+@app.get("/v1/payments/{payment_id}")
+async def fetch_payment(payment_id: str):
+    await simulate()
+    # Orders created here count as paid, so the full booking flow can complete
+    if payment_id not in orders and not payment_id.startswith("pay_"):
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return {"id": payment_id, "entity": "payment", "status": "captured"}
+
+@app.post("/v1/payments/{payment_id}/refund")
+async def refund_payment(payment_id: str, request: Request):
+    await simulate()
+    data = await request.json()
+    return {"id": f"rfnd_{uuid.uuid4().hex[:14]}", "entity": "refund", "amount": data.get("amount", 0), "status": "processed"}
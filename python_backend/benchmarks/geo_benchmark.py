@@ -0,0 +1,77 @@
+
+"""Near-me search: geohash index ranges vs a brute-force haversine scan.
+
+Seeds an in-memory SQLite catalog with services spread over India and runs
+radius queries both ways: the indexed geohash cell ranges used by
+GET /api/services/nearby, and reading every row's coordinates.
+
+Run from python_backend/:  python -m benchmarks.geo_benchmark [num_services]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from database.connection import Base
+from models.service import Service
+from services.geo_search import service_geohash, within_cells
+from utils.geohash import haversine_km
+
+# (name, lat, lng) centres that services cluster around
+CENTRES = [
+    ("Mumbai", 19.076, 72.877), ("Delhi", 28.613, 77.209), ("Bengaluru", 12.972, 77.594),
+    ("Goa", 15.491, 73.827), ("Jaipur", 26.912, 75.787), ("Kochi", 9.931, 76.267),
+]
+QUERIES = [(19.08, 72.88, 5), (28.61, 77.21, 10), (15.49, 73.83, 25), (26.9, 75.8, 50), (22.0, 80.0, 100)]
+
+def seed(engine, count: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        city, lat, lng = rng.choice(CENTRES)
+        lat += rng.gauss(0, 0.5)
+        lng += rng.gauss(0, 0.5)
+        rows.append({
+            "title": f"Service {i}", "type": "hotel", "location": city, "city": city, "state": city,
+            "latitude": lat, "longitude": lng, "geohash": service_geohash(lat, lng),
+            "price_per_person": 1000, "rating": 4, "is_active": True, "created_at": now, "updated_at": now,
+        })
+    with Session(engine) as db:
+        db.execute(insert(Service), rows)
+        db.commit()
+
+def indexed(db, lat, lng, radius):
+    rows = db.execute(select(Service.id, Service.latitude, Service.longitude).where(within_cells(lat, lng, radius))).all()
+    return {row.id for row in rows if haversine_km(lat, lng, row.latitude, row.longitude) <= radius}
+
+def brute_force(db, lat, lng, radius):
+    rows = db.execute(select(Service.id, Service.latitude, Service.longitude)).all()
+    return {row.id for row in rows if haversine_km(lat, lng, row.latitude, row.longitude) <= radius}
+
+def timed(fn, repeat: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    seed(engine, count)
+    print(f"Seeded {count:,} services in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'query':<24} {'scan ms':>10} {'index ms':>10} {'hits':>8}")
+    with Session(engine) as db:
+        for lat, lng, radius in QUERIES:
+            scan_ms, expected = timed(lambda: brute_force(db, lat, lng, radius))
+            index_ms, found = timed(lambda: indexed(db, lat, lng, radius))
+            assert found == expected, "index and scan disagree"
+            print(f"{f'{lat},{lng} r={radius}km':<24} {scan_ms:>10.1f} {index_ms:>10.1f} {len(found):>8,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+
+"""Concurrent booking confirmations against one hot service.
+
+Fires many single-seat reservations at a service with limited availability
+and checks that exactly `availability` of them succeed and the stored count
+never goes negative. Reports reservation throughput.
+
+Run from python_backend/:  python -m benchmarks.inventory_stress [attempts] [availability] [concurrency]
+"""
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from database.connection import get_engine, Base, AsyncSessionLocal, dispose_engines
+from models.inventory import ServiceInventory
+from models.service import Service
+from services.inventory_service import reserve_inventory
+
+TRAVEL_DATE = date.today() + timedelta(days=30)
+
+async def attempt(service_id: int, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore:
+        for _ in range(5):
+            try:
+                async with AsyncSessionLocal() as db:
+                    reserved = await reserve_inventory(db, service_id, TRAVEL_DATE, 1)
+                    await db.commit()
+                    return reserved
+            except Exception:
+                # SQLite reports write contention as "database is locked"
+                await asyncio.sleep(0.01)
+        return False
+
+async def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    availability = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    Base.metadata.create_all(bind=get_engine())
+    async with AsyncSessionLocal() as db:
+        service = Service(
+            title="Stress Test Bus", type="bus", location="Swargate", city="Pune",
+            state="Maharashtra", price_per_person=800, availability=availability
+        )
+        db.add(service)
+        await db.commit()
+        service_id = service.id
+
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(attempt(service_id, semaphore) for _ in range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        remaining = await db.scalar(select(ServiceInventory.available).where(
+            ServiceInventory.service_id == service_id,
+            ServiceInventory.date == TRAVEL_DATE
+        ))
+        await db.delete(await db.get(ServiceInventory, (service_id, TRAVEL_DATE)))
+        await db.delete(await db.get(Service, service_id))
+        await db.commit()
+    await dispose_engines()
+
+    succeeded = sum(results)
+    print(f"{attempts} attempts, concurrency {concurrency}: {succeeded} reserved, {remaining} left")
+    print(f"throughput: {attempts / elapsed:.1f} reservations/s")
+    assert remaining >= 0, "availability went negative"
+    assert succeeded + remaining == availability, "lost or oversold inventory"
+    assert succeeded == min(attempts, availability) or remaining == 0, "reservations rejected while stock remained"
+    print("OK: no overselling")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,271 @@
+
+"""Reproducible end-to-end load test of the booking API, fully offline.
+
+Seeds a fresh database with synthetic services, users and past bookings,
+then runs virtual users through search -> view -> book -> pay -> verify ->
+cancel against the FastAPI app in-process, and some make a group booking
+through /api/bookings/bulk instead. Razorpay is the fake gateway, mounted
+through an ASGI transport. SMTP is the local sink on loopback. Nothing
+leaves the machine.
+
+Writes p50/p95/p99 latency and throughput per endpoint as JSON, so runs can
+be compared across commits.
+
+Run from python_backend/ (SQLite by default, or any DATABASE_URL):
+    python -m benchmarks.load_test --services 5000 --users 200 --sessions 2000 --concurrency 50
+    DATABASE_URL=postgresql://localhost/travelgo_load python -m benchmarks.load_test
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--services", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=2000, help="past bookings seeded for history reads")
+    parser.add_argument("--sessions", type=int, default=1000, help="virtual user sessions to run")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--browse-ratio", type=float, default=0.6, help="sessions that only search and view")
+    parser.add_argument("--bulk-ratio", type=float, default=0.1, help="booking sessions that make a group booking")
+    parser.add_argument("--cancel-ratio", type=float, default=0.3, help="paid bookings that are then cancelled")
+    parser.add_argument("--gateway-latency-ms", type=float, default=50)
+    parser.add_argument("--gateway-error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", action="store_true", help="keep rate limiting on (off by default)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_test_report.json")
+    return parser.parse_args()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def configure_environment(args, smtp_port: int):
+    """Must run before the app modules are imported; they read settings at import"""
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./load_test.db")
+    os.environ["RAZORPAY_KEY"] = "fake"
+    os.environ["RAZORPAY_BASE_URL"] = "http://fake-gateway/v1"
+    os.environ["PAYMENT_MOCK_FALLBACK"] = "false"
+    os.environ["SMTP_HOST"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = str(smtp_port)
+    os.environ["SMTP_STARTTLS"] = "false"
+    os.environ["OUTBOX_POLL_INTERVAL"] = "0.2"
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if args.rate_limit else "false"
+    os.environ["FAKE_GATEWAY_LATENCY_MS"] = str(args.gateway_latency_ms)
+    os.environ["FAKE_GATEWAY_ERROR_RATE"] = str(args.gateway_error_rate)
+
+def reset_database():
+    from database.connection import Base, get_engine
+    from database.migrations import run_migrations
+    import models.user, models.service, models.booking, models.inventory, models.email_outbox  # noqa: F401
+
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS alembic_version")
+    run_migrations()
+
+def seed(args, rng: random.Random):
+    """Insert services, users and past bookings; returns (service ids, user ids, cities)"""
+    from sqlalchemy import insert
+    from database.connection import get_engine
+    from models.booking import Booking
+    from models.service import Service
+    from models.user import User
+    from services.geo_search import service_geohash
+    from utils.amenities import amenity_tags
+    from utils.indian_cities import INDIAN_CITIES
+
+    amenities = ["wifi", "pool", "ac", "parking", "breakfast", "gym", "charging"]
+    now = datetime.now(timezone.utc)
+    services = []
+    for i in range(1, args.services + 1):
+        city = rng.choice(INDIAN_CITIES)
+        latitude, longitude = rng.uniform(8, 34), rng.uniform(69, 95)
+        offered = json.dumps(rng.sample(amenities, rng.randint(1, 4)))
+        services.append({
+            "id": i, "title": f"Load Test Service {i}", "description": "Synthetic service",
+            "type": rng.choice(["hotel", "bus"]), "location": f"Area {rng.randint(1, 200)}, {city}",
+            "city": city, "state": "State", "latitude": latitude, "longitude": longitude,
+            "geohash": service_geohash(latitude, longitude), "price_per_person": rng.randint(300, 15000),
+            "currency": "INR", "availability": 10000, "rating": round(rng.uniform(2.5, 5), 1),
+            "amenities": offered, "amenity_tags": amenity_tags(offered), "is_active": True,
+            "created_at": now, "updated_at": now,
+        })
+    users = [
+        {"id": f"load-user-{i}", "email": f"load-user-{i}@example.com", "first_name": "Load", "last_name": str(i),
+         "is_active": True, "is_admin": False, "created_at": now, "updated_at": now}
+        for i in range(1, args.users + 1)
+    ]
+    bookings = []
+    for _ in range(args.bookings):
+        service = rng.choice(services)
+        people = rng.randint(1, 4)
+        bookings.append({
+            "user_id": rng.choice(users)["id"], "service_id": service["id"],
+            "booking_date": date.today() - timedelta(days=rng.randint(1, 365)), "number_of_people": people,
+            "total_amount": service["price_per_person"] * people, "currency": "INR",
+            "status": "confirmed", "payment_status": "completed", "created_at": now, "updated_at": now,
+        })
+
+    with get_engine().begin() as conn:
+        for table, rows in ((Service, services), (User, users), (Booking, bookings)):
+            for start in range(0, len(rows), 1000):
+                conn.execute(insert(table), rows[start:start + 1000])
+    return [s["id"] for s in services], [u["id"] for u in users], sorted({s["city"] for s in services})
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client, name: str, method: str, url: str, ok=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            response, status = None, type(e).__name__
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        self.statuses[name][str(status)] += 1
+        return response if response is not None and response.status_code in ok else None
+
+    def report(self, elapsed: float) -> dict:
+        def percentile(values, q):
+            return round(values[min(len(values) - 1, int(len(values) * q))], 2)
+
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            statuses = dict(self.statuses[name])
+            endpoints[name] = {
+                "count": len(values),
+                "errors": sum(n for status, n in statuses.items() if not status.startswith("2")),
+                "statuses": statuses,
+                "p50_ms": percentile(values, 0.50),
+                "p95_ms": percentile(values, 0.95),
+                "p99_ms": percentile(values, 0.99),
+                "max_ms": round(values[-1], 2),
+                "throughput_rps": round(len(values) / elapsed, 2),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {"endpoints": endpoints, "total_requests": total, "elapsed_s": round(elapsed, 3),
+                "throughput_rps": round(total / elapsed, 2)}
+
+async def session(client, recorder: Recorder, rng: random.Random, args, token: str, cities, service_ids):
+    """One virtual user: browse, and for some, book through to payment"""
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await recorder.call(client, "search", "GET", "/api/services/",
+                                   params={"city": rng.choice(cities), "limit": 20})
+    results = response.json() if response is not None else []
+    service_id = rng.choice(results)["id"] if results else rng.choice(service_ids)
+    await recorder.call(client, "view", "GET", f"/api/services/{service_id}")
+    if rng.random() < args.browse_ratio:
+        return
+
+    travel_date = (date.today() + timedelta(days=rng.randint(7, 120))).isoformat()
+    if rng.random() < args.bulk_ratio:
+        # Group booking: several services, and the same one twice to combine demand
+        picks = [rng.choice(results)["id"] if results else rng.choice(service_ids) for _ in range(rng.randint(1, 3))]
+        items = [{"service_id": pick, "booking_date": travel_date, "number_of_people": rng.randint(1, 3)}
+                 for pick in picks + [service_id, service_id]]
+        await recorder.call(client, "bulk", "POST", "/api/bookings/bulk", headers=headers, json={"items": items})
+        await recorder.call(client, "history", "GET", "/api/bookings/", headers=headers)
+        return
+
+    response = await recorder.call(client, "book", "POST", "/api/bookings/", headers=headers, json={
+        "service_id": service_id, "booking_date": travel_date, "number_of_people": rng.randint(1, 3)
+    })
+    if response is None:
+        return
+    booking_id = response.json()["id"]
+
+    response = await recorder.call(client, "pay", "POST", f"/api/bookings/{booking_id}/payment", headers=headers,
+                                   json={"booking_id": booking_id, "payment_method": "card"})
+    if response is not None:
+        await recorder.call(client, "verify", "POST", f"/api/bookings/{booking_id}/payment/verify", headers=headers,
+                            params={"payment_id": response.json()["payment_id"], "transaction_id": f"txn_{booking_id}"})
+    await recorder.call(client, "history", "GET", "/api/bookings/", headers=headers)
+    if rng.random() < args.cancel_ratio:
+        await recorder.call(client, "cancel", "DELETE", f"/api/bookings/{booking_id}", headers=headers)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+async def run(args):
+    from benchmarks.smtp_sink import SMTPSink
+
+    sink = SMTPSink()
+    smtp_port = free_port()
+    smtp_server = await sink.start(port=smtp_port)
+    configure_environment(args, smtp_port)
+
+    import httpx
+    from benchmarks import fake_gateway
+    from main import create_app
+    from middleware.auth import create_access_token
+    from services import payment_service
+
+    rng = random.Random(args.seed)
+    print(f"Seeding {args.services:,} services, {args.users:,} users, {args.bookings:,} bookings...")
+    reset_database()
+    service_ids, user_ids, cities = seed(args, rng)
+    tokens = [create_access_token({"sub": user_id}, expires_delta=timedelta(hours=12)) for user_id in user_ids]
+
+    # Razorpay calls go to the fake gateway app in-process instead of the network
+    payment_service.client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fake_gateway.app),
+        base_url=os.environ["RAZORPAY_BASE_URL"],
+        timeout=payment_service.PAYMENT_TIMEOUT
+    )
+
+    app = create_app()
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(i: int):
+        async with semaphore:
+            await session(client, recorder, random.Random(args.seed * 100_003 + i), args,
+                          tokens[i % len(tokens)], cities, service_ids)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://travelgo") as client:
+            print(f"Running {args.sessions:,} sessions at concurrency {args.concurrency}...")
+            start = time.perf_counter()
+            await asyncio.gather(*(limited(i) for i in range(args.sessions)))
+            elapsed = time.perf_counter() - start
+            # Give the outbox worker a moment to drain confirmation emails
+            await asyncio.sleep(1)
+
+    smtp_server.close()
+    report = {
+        "commit": git_commit(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        **recorder.report(elapsed),
+        "emails_delivered": len(sink.messages),
+        "gateway": dict(fake_gateway.stats),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'endpoint':<10} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>8}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<10} {stats['count']:>7} {stats['errors']:>7} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['throughput_rps']:>8}")
+    print(f"Total {report['total_requests']:,} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s); report written to {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
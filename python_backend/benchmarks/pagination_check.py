@@ -0,0 +1,93 @@
+
+"""Regression check for keyset pagination of the booking history.
+
+Seeds bookings that share one created_at second (SQLite's CURRENT_TIMESTAMP
+has no fractions), then pages through GET /api/bookings/ a few rows at a
+time and asserts every booking comes back exactly once, newest first.
+Exits non-zero on any regression, so it can gate CI.
+
+Run from python_backend/ (SQLite by default, or any DATABASE_URL):
+    python -m benchmarks.pagination_check
+"""
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./pagination_check.db")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+BOOKINGS = 16
+PAGE_SIZE = 3
+USER_ID = "pagination-check-user"
+
+def reset_database():
+    from database.connection import Base, get_engine
+    from database.migrations import run_migrations
+    import models.user, models.service, models.booking, models.inventory, models.email_outbox  # noqa: F401
+
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS alembic_version")
+    run_migrations()
+
+def seed():
+    """One service and BOOKINGS bookings inserted in a single statement, so one timestamp"""
+    from sqlalchemy import insert
+    from database.connection import get_engine
+    from models.booking import Booking
+    from models.service import Service
+    from models.user import User
+
+    with get_engine().begin() as conn:
+        conn.execute(insert(User), [{"id": USER_ID, "email": "pagination@example.com", "first_name": "Page",
+                                     "last_name": "Check", "is_active": True, "is_admin": False}])
+        service_id = conn.execute(insert(Service).values(
+            title="Pagination Check Service", description="Synthetic service", type="hotel",
+            location="Baga, Goa", city="Goa", state="Goa", price_per_person=1000, currency="INR",
+            availability=100, rating=4, is_active=True
+        )).inserted_primary_key[0]
+        conn.execute(insert(Booking), [{
+            "user_id": USER_ID, "service_id": service_id, "booking_date": date.today() + timedelta(days=i + 1),
+            "number_of_people": 1, "total_amount": 1000, "currency": "INR",
+            "status": "confirmed", "payment_status": "completed",
+        } for i in range(BOOKINGS)])
+
+async def page_through() -> list:
+    import httpx
+    from main import create_app
+    from middleware.auth import create_access_token
+
+    token = create_access_token({"sub": USER_ID})
+    transport = httpx.ASGITransport(app=create_app())
+    seen, cursor = [], None
+    async with httpx.AsyncClient(transport=transport, base_url="http://travelgo") as client:
+        # Bounded, so a cursor that never advances fails instead of looping
+        for _ in range(BOOKINGS):
+            params = {"limit": PAGE_SIZE, "include_service": "true"}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/bookings/", params=params,
+                                        headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            seen.extend(booking["id"] for booking in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+    return seen
+
+def main() -> int:
+    reset_database()
+    seed()
+    seen = asyncio.run(page_through())
+    expected = sorted(seen, reverse=True)
+    ok = len(seen) == BOOKINGS and len(set(seen)) == BOOKINGS and seen == expected
+    print(f"[{'ok' if ok else 'FAIL'}] paged {len(seen)} bookings ({len(set(seen))} unique) "
+          f"in pages of {PAGE_SIZE}, expected {BOOKINGS}")
+    if not ok:
+        print(f"    got {seen}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
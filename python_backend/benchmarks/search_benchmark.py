@@ -0,0 +1,51 @@
+
+"""Destination search: full scan vs trigram index at catalog scale.
+
+Run from python_backend/:  python -m benchmarks.search_benchmark [num_services]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from services.search_index import TrigramIndex
+
+CITIES = [
+    ("Mumbai", "Maharashtra"), ("Pune", "Maharashtra"), ("Goa", "Goa"),
+    ("Delhi", "Delhi"), ("Jaipur", "Rajasthan"), ("Udaipur", "Rajasthan"),
+    ("Bengaluru", "Karnataka"), ("Mysuru", "Karnataka"), ("Chennai", "Tamil Nadu"),
+    ("Kochi", "Kerala"), ("Manali", "Himachal Pradesh"), ("Shimla", "Himachal Pradesh"),
+]
+AREAS = ["Beach Road", "Old Town", "MG Road", "Station Road", "Lake View", "Hill Top", "Airport Road", "Fort Area"]
+TERMS = ["goa", "mumbai", "lake view", "rajasthan", "mumbia", "bengaluru", "udiapur", "xyz"]
+
+def synthetic_rows(count: int):
+    rng = random.Random(42)
+    for service_id in range(1, count + 1):
+        city, state = rng.choice(CITIES)
+        yield service_id, f"{rng.choice(AREAS)} {rng.randint(1, 500)}, {city}", city, state
+
+def timed(fn, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    index = TrigramIndex()
+
+    start = time.perf_counter()
+    index.load(synthetic_rows(count))
+    print(f"Indexed {count:,} services in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'term':<12} {'scan ms':>10} {'index ms':>10} {'scan hits':>10} {'index hits':>11}")
+    for term in TERMS:
+        scan_ms, scanned = timed(lambda: index.scan(term))
+        index_ms, found = timed(lambda: index.search(term))
+        print(f"{term:<12} {scan_ms:>10.2f} {index_ms:>10.2f} {len(scanned):>10,} {len(found):>11,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+
+"""List endpoint serialization: ORM + Pydantic vs column projection + orjson.
+
+The slow path is what search_services used to do: load full ORM objects,
+validate each into ServiceResponse and let FastAPI encode the list. The fast
+path selects only the response columns and hands plain dicts to orjson.
+
+Run from python_backend/:  python -m benchmarks.serialization_benchmark [rows ...]
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from database.connection import Base
+from models.service import Service
+from schemas.service import ServiceResponse
+from utils.serialization import dumps, projection, rows_to_dicts
+
+CITIES = ["Mumbai", "Goa", "Delhi", "Jaipur", "Bengaluru", "Kochi"]
+
+def seed(engine, count: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "title": f"Service {i}",
+            "description": "A comfortable stay close to the main attractions.",
+            "type": rng.choice(["hotel", "bus"]),
+            "location": f"MG Road {i}",
+            "city": rng.choice(CITIES),
+            "state": "State",
+            "price_per_person": Decimal(rng.randint(500, 20000)),
+            "availability": rng.randint(1, 50),
+            "rating": Decimal(rng.randint(0, 50)) / 10,
+            "amenities": json.dumps(["wifi", "parking"]),
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+    with Session(engine) as db:
+        db.execute(insert(Service), rows)
+        db.commit()
+
+def orm_path(engine) -> bytes:
+    with Session(engine) as db:
+        services = db.scalars(select(Service)).all()
+        results = [ServiceResponse.model_validate(service) for service in services]
+        return json.dumps(jsonable_encoder(results)).encode()
+
+def projected_path(engine) -> bytes:
+    keys = list(ServiceResponse.model_fields)
+    with Session(engine) as db:
+        rows = db.execute(select(*projection(Service, ServiceResponse))).all()
+        return dumps(rows_to_dicts(rows, keys))
+
+def timed(fn, repeat: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    return (time.perf_counter() - start) / repeat * 1000, len(body)
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000]
+    print(f"{'rows':>8} {'orm ms':>10} {'fast ms':>10} {'speedup':>8} {'bytes':>12}")
+    for count in sizes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        seed(engine, count)
+        repeat = max(3, 20_000 // count)
+        orm_ms, size = timed(lambda: orm_path(engine), repeat)
+        fast_ms, _ = timed(lambda: projected_path(engine), repeat)
+        print(f"{count:>8,} {orm_ms:>10.1f} {fast_ms:>10.1f} {orm_ms / fast_ms:>7.1f}x {size:>12,}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
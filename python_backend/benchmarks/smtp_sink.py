@@ -0,0 +1,89 @@
+
+"""Local SMTP sink that accepts and counts messages without delivering them.
+
+Point the backend at it for offline tests of the email outbox:
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false
+Run from python_backend/:  python -m benchmarks.smtp_sink [port] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+
+class SMTPSink:
+    """Minimal SMTP server speaking just enough of RFC 5321 for aiosmtplib"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = []
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 travelgo-sink ESMTP")
+        envelope = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-travelgo-sink")
+                    await reply("250-8BITMIME")
+                    await reply("250 SMTPUTF8")
+                elif verb == "HELO":
+                    await reply("250 travelgo-sink")
+                elif verb == "MAIL":
+                    envelope = {"from": command[10:].strip(), "to": []}
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    envelope.setdefault("to", []).append(command[8:].strip())
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        chunk = await reader.readline()
+                        if chunk in (b".\r\n", b".\n", b""):
+                            break
+                        data.append(chunk)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    envelope["data"] = b"".join(data)
+                    envelope["received_at"] = time.time()
+                    self.messages.append(envelope)
+                    envelope = {}
+                    await reply("250 OK: queued")
+                elif verb in ("RSET", "NOOP"):
+                    envelope = {}
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 2525):
+        return await asyncio.start_server(self.handle, host, port)
+
+async def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 2525
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    sink = SMTPSink(latency=latency)
+    server = await sink.start(port=port)
+    print(f"SMTP sink listening on 127.0.0.1:{port}")
+    async with server:
+        while True:
+            await asyncio.sleep(10)
+            print(f"{len(sink.messages)} messages over {sink.connections} connections")
+
+if __name__ == "__main__":
+    asyncio.run(main())
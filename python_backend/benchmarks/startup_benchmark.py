@@ -0,0 +1,52 @@
+
+"""Cold-start timing: process import -> app ready -> first response.
+
+Each run starts a fresh interpreter so module import and pool setup are
+measured cold. Compare prewarming on and off:
+    python -m benchmarks.startup_benchmark [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+from main import create_app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+app = create_app()
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    client.get("/api/services/1")
+    first = time.perf_counter()
+    client.get("/api/services/1")
+    second = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_response_ms": (first - ready) * 1000,
+    "second_response_ms": (second - first) * 1000,
+    "import_to_first_response_ms": (first - start) * 1000,
+}))
+"""
+
+def run(prewarm: int) -> dict:
+    env = {**os.environ, "DB_PREWARM_CONNECTIONS": str(prewarm)}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for prewarm in (0, int(os.getenv("DB_PREWARM_CONNECTIONS", "5"))):
+        samples = [run(prewarm) for _ in range(runs)]
+        print(f"prewarm={prewarm} ({runs} runs, median ms)")
+        for key in samples[0]:
+            print(f"  {key:<30} {statistics.median(s[key] for s in samples):8.1f}")
+
+if __name__ == "__main__":
+    main()
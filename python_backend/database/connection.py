@@ -1,33 +1,292 @@
 
+import asyncio
+import itertools
 import os
-from sqlalchemy import create_engine
+import time
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from dotenv import load_dotenv
+from utils.metrics import registry
+from utils.ttl_cache import TTLCache
 
 load_dotenv()
 
-# Get database URL from environment variables
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Pool settings; engines are created on first use, not at import
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+DB_PREWARM_CONNECTIONS = int(os.getenv("DB_PREWARM_CONNECTIONS", "5"))
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set. Please provision a PostgreSQL database in Replit.")
+# Comma-separated read replica URLs; read-only routes are spread across them
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+REPLICA_POOL_SIZE = int(os.getenv("REPLICA_POOL_SIZE", str(DB_POOL_SIZE)))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+# A check that takes longer than this (e.g. a black-holed host) counts as failed
+REPLICA_HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "2"))
+# Replicas further behind than this are taken out of rotation
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+# After a client commits, its reads stay on the primary so it sees its own writes.
+# Tracked per worker process: with several workers, a read served by another
+# worker than the write may still hit a replica, so run behind a load balancer
+# with client affinity or keep this to what REPLICA_MAX_LAG_SECONDS tolerates
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "15"))
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=300
+_engine: Engine = None
+_async_engine: AsyncEngine = None
+
+pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
 )
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waits"""
+    label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start, self.label)
+
+def timed_pool_class(label: str) -> type:
+    """TimedQueuePool reporting under its own label; a class so it survives pool recreation"""
+    return type(f"TimedQueuePool[{label}]", (TimedQueuePool,), {"label": label})
+
+def _pool_samples(read) -> dict:
+    # Engines are created lazily, so there may be nothing to report yet
+    engines = [("primary", _async_engine)] + [(replica.name, replica.engine) for replica in replica_router.replicas]
+    return {(name,): read(engine.pool) for name, engine in engines if engine is not None}
+
+registry.gauge("db_replica_healthy", "1 if the replica is in read rotation", ("pool",),
+               lambda: {(replica.name,): int(replica.healthy) for replica in replica_router.replicas})
+registry.gauge("db_replica_lag_seconds", "Replication lag at the last health check", ("pool",),
+               lambda: {(replica.name,): replica.lag for replica in replica_router.replicas if replica.lag is not None})
+registry.gauge("db_pool_size", "Configured pool size", ("pool",), lambda: _pool_samples(lambda p: p.size()))
+registry.gauge("db_pool_checked_out", "Connections currently checked out", ("pool",), lambda: _pool_samples(lambda p: p.checkedout()))
+registry.gauge("db_pool_checked_in", "Idle connections in the pool", ("pool",), lambda: _pool_samples(lambda p: p.checkedin()))
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size", ("pool",), lambda: _pool_samples(lambda p: max(p.overflow(), 0)))
+
+def get_database_url() -> str:
+    # Get database URL from environment variables
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set. Please provision a PostgreSQL database in Replit.")
+    return url
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (asyncpg / aiosqlite)"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        url = "postgresql+asyncpg://" + url.split("://", 1)[1]
+        # asyncpg takes `ssl` rather than libpq's `sslmode`
+        url = url.replace("sslmode=", "ssl=")
+    elif url.startswith("sqlite://"):
+        url = "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+def get_engine() -> Engine:
+    """Sync engine, used for migrations and scripts"""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            get_database_url(),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    return _engine
+
+def get_async_engine() -> AsyncEngine:
+    """Async engine used by request handlers so DB round trips don't block the event loop"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            os.getenv("ASYNC_DATABASE_URL") or to_async_url(get_database_url()),
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    return _async_engine
+
+class _LazySessionMaker(sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+class _LazyAsyncSessionMaker(async_sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_async_engine())
+        return super().__call__(**local_kw)
+
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionMaker(autocommit=False, autoflush=False)
+
+# Objects stay readable after commit; lazy loads are not available in async code
+AsyncSessionLocal = _LazyAsyncSessionMaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Create Base class
 Base = declarative_base()
 
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.engine: Optional[AsyncEngine] = None
+        # Health checks open their own connection instead of taking one from request traffic
+        self.check_engine: Optional[AsyncEngine] = None
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.sessions = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    def get_engine(self) -> AsyncEngine:
+        if self.engine is None:
+            self.engine = create_async_engine(
+                to_async_url(self.url),
+                poolclass=timed_pool_class(self.name),
+                pool_size=REPLICA_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=DB_POOL_RECYCLE
+            )
+            self.sessions.configure(bind=self.engine)
+        return self.engine
+
+    async def _measure_lag(self) -> float:
+        if self.check_engine is None:
+            self.check_engine = create_async_engine(to_async_url(self.url), poolclass=NullPool)
+        async with self.check_engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                await conn.execute(text("SELECT 1"))
+                return 0.0
+            # Zero once everything received has been replayed, even if the primary is idle
+            return float(await conn.scalar(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )) or 0)
+
+    async def check(self):
+        """Mark the replica healthy if it answers in time and is not too far behind"""
+        try:
+            self.lag = await asyncio.wait_for(self._measure_lag(), REPLICA_HEALTH_TIMEOUT)
+            healthy = self.lag <= REPLICA_MAX_LAG_SECONDS
+            if not healthy and self.healthy:
+                print(f"Replica {self.name} is {self.lag:.1f}s behind, taking it out of rotation")
+        except asyncio.TimeoutError:
+            if self.healthy:
+                print(f"Replica {self.name} did not answer its health check within {REPLICA_HEALTH_TIMEOUT}s")
+            healthy = False
+        except Exception as e:
+            if self.healthy:
+                print(f"Replica {self.name} failed its health check: {e}")
+            healthy = False
+        if healthy and not self.healthy:
+            print(f"Replica {self.name} is back in rotation")
+        self.healthy = healthy
+
+    async def dispose(self):
+        if self.check_engine is not None:
+            await self.check_engine.dispose()
+            self.check_engine = None
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self.sessions.configure(bind=None)
+
+class ReplicaRouter:
+    """Round-robin over healthy read replicas, falling back to the primary"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica-{i}", url) for i, url in enumerate(urls, 1)]
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        # Clients that committed recently; their reads go to the primary
+        self.recent_writers = TTLCache(max_size=100_000, ttl=REPLICA_STICKY_SECONDS)
+
+    def choose(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_all(self):
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+            await self.check_all()
+
+    async def start(self):
+        if not self.replicas:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+replica_router = ReplicaRouter(REPLICA_DATABASE_URLS)
+
+def _client_key(request: Request) -> str:
+    # Keyed by user id like the rate limiter, not the raw token: a login commits
+    # under the token it was called with, then the client reads with a new JWT
+    from middleware.rate_limit import client_key
+    return client_key(request.scope)
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    client = session.info.get("client")
+    if client is not None:
+        replica_router.recent_writers.set(client, True)
+
+async def prewarm_pool(connections: int = DB_PREWARM_CONNECTIONS):
+    """Open pool connections up front so the first requests don't pay for them"""
+    engine = get_async_engine()
+    connections = min(connections, DB_POOL_SIZE)
+    if connections <= 0:
+        return
+
+    async def open_connection():
+        conn = engine.connect()
+        await conn.start()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    opened = await asyncio.gather(*(open_connection() for _ in range(connections)))
+    # Closing returns them to the pool, still connected
+    for conn in opened:
+        await conn.close()
+
+async def dispose_engines():
+    global _engine, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    SessionLocal.configure(bind=None)
+    AsyncSessionLocal.configure(bind=None)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -35,3 +294,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get async database session
+async def get_async_db(request: Request):
+    # Tag the session so its commits keep this client's reads on the primary
+    info = {"client": _client_key(request)} if replica_router.replicas else {}
+    async with AsyncSessionLocal(info=info) as db:
+        yield db
+
+# Dependency for read-only routes: a replica session when one is healthy
+async def get_read_db(request: Request):
+    replica = replica_router.choose()
+    if replica is None or replica_router.recent_writers.get(_client_key(request)):
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    replica.get_engine()
+    async with replica.sessions() as db:
+        yield db
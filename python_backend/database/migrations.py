@@ -0,0 +1,55 @@
+
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from database.connection import get_engine, Base
+
+# pg_advisory_xact_lock key shared by every process that runs migrations
+MIGRATION_LOCK_ID = 7_267_110_815
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["configure_logging"] = False
+    return config
+
+def _adopt_legacy_schema(connection):
+    """Bring a database created by Base.metadata.create_all up to revision 0001"""
+    import models.user, models.service, models.booking, models.inventory, models.email_outbox  # noqa: F401
+
+    Base.metadata.create_all(bind=connection, tables=[
+        Base.metadata.tables[name] for name in ("service_inventory", "email_outbox")
+    ])
+    columns = {column["name"] for column in inspect(connection).get_columns("services")}
+    if "external_id" not in columns:
+        connection.execute(text("ALTER TABLE services ADD COLUMN external_id VARCHAR(100)"))
+        connection.execute(text("CREATE UNIQUE INDEX ix_services_external_id ON services (external_id)"))
+    # Revision 0001 also installs trigram search, which create_all never did
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for column in ("location", "city", "state"):
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_services_{column}_trgm ON services USING gin ({column} gin_trgm_ops)"
+            ))
+
+def run_migrations():
+    """Upgrade the database to the latest revision.
+
+    Safe to call from every worker at startup: on PostgreSQL the upgrade runs
+    under an advisory lock, so one worker migrates while the others wait and
+    then find the database already at head.
+    """
+    config = alembic_config()
+    with get_engine().begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Released when this transaction commits or rolls back
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "services" in tables and "alembic_version" not in tables:
+            _adopt_legacy_schema(connection)
+            command.stamp(config, "0001")
+        command.upgrade(config, "head")
@@ -0,0 +1,34 @@
+
+"""Bulk import a partner service catalog from CSV or JSONL.
+
+Usage: python import_catalog.py services.csv [--format csv|jsonl] [--chunk-size 1000]
+
+Running servers see the new services in destination search within
+SEARCH_INDEX_REFRESH_SECONDS (SQLite only; PostgreSQL searches the table).
+"""
+import argparse
+import asyncio
+import json
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database.connection import AsyncSessionLocal, dispose_engines
+from services.catalog_import import import_services, iter_rows, detect_format, IMPORT_CHUNK_SIZE
+
+async def main():
+    parser = argparse.ArgumentParser(description="Import services into TravelGo")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8", newline="") as stream:
+        async with AsyncSessionLocal() as db:
+            report = await import_services(db, iter_rows(stream, args.format or detect_format(args.path)), args.chunk_size)
+    await dispose_engines()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,51 +1,125 @@
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
 
-from database.connection import engine, Base
+from database.connection import AsyncSessionLocal, prewarm_pool, dispose_engines, replica_router
+from database.migrations import run_migrations
 from routes import auth, services, bookings, users
 from middleware.auth import verify_token
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.idempotency import IdempotencyMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.sql_profiler import SQLProfilerMiddleware
+from services.inventory_service import run_hold_expiry
+from services.email_service import run_outbox_worker, smtp_pool
+from services.payment_service import close_payment_client
+from services.search_index import service_index
+from services.availability_events import availability_broker
+from utils.metrics import registry
 
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="TravelGo API",
-    description="Real-time unified travel booking platform for India",
-    version="2.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(services.router, prefix="/api/services", tags=["Services"])
-app.include_router(bookings.router, prefix="/api/bookings", tags=["Bookings"])
-app.include_router(users.router, prefix="/api/users", tags=["Users"])
-
-@app.get("/")
-async def root():
-    return {"message": "TravelGo API - Python Backend", "version": "2.0.0"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "backend": "Python FastAPI"}
+# Each worker migrates at startup (serialized by an advisory lock on PostgreSQL);
+# set to false to run migrations as a separate deploy step instead
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+
+async def prime_caches():
+    """Load in-process caches before the first request needs them"""
+    async with AsyncSessionLocal() as db:
+        # PostgreSQL searches through pg_trgm; other databases use the in-process index
+        if db.get_bind().dialect.name != "postgresql":
+            await service_index.ensure_loaded(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Apply schema migrations (sync Alembic, kept off the event loop)
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await asyncio.to_thread(run_migrations)
+    await prewarm_pool()
+    await replica_router.start()
+    await prime_caches()
+    await availability_broker.start()
+
+    workers = [
+        asyncio.create_task(run_hold_expiry()),
+        asyncio.create_task(run_outbox_worker()),
+    ]
+    app.state.ready = True
+    yield
+    app.state.ready = False
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await smtp_pool.close()
+    await close_payment_client()
+    await availability_broker.stop()
+    await replica_router.stop()
+    await dispose_engines()
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="TravelGo API",
+        description="Real-time unified travel booking platform for India",
+        version="2.0.0",
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        lifespan=lifespan
+    )
+    app.state.ready = False
+
+    # Innermost, so only queries made while handling the request are counted
+    app.add_middleware(SQLProfilerMiddleware)
+
+    # Rate limiting and load shedding; CORS headers wrap its 429/503s
+    app.add_middleware(RateLimitMiddleware)
+
+    # Outside rate limiting, so replays and waiting duplicates hold no admission slot
+    app.add_middleware(IdempotencyMiddleware)
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Outermost, so shed and rate-limited requests are measured too
+    app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(services.router, prefix="/api/services", tags=["Services"])
+    app.include_router(bookings.router, prefix="/api/bookings", tags=["Bookings"])
+    app.include_router(users.router, prefix="/api/users", tags=["Users"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "TravelGo API - Python Backend", "version": "2.0.0"}
+
+    @app.get("/health")
+    async def health_check():
+        if not app.state.ready:
+            raise HTTPException(status_code=503, detail="Starting up")
+        return {"status": "healthy", "backend": "Python FastAPI"}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
     uvicorn.run(
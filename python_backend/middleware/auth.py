@@ -2,17 +2,27 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from database.connection import get_db
+from database.connection import AsyncSessionLocal, get_async_db, get_read_db, replica_router
 from models.user import User
+from utils.ttl_cache import TTLCache
 import os
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified tokens and user rows are cached per worker; TTL bounds staleness
+# across workers, and profile updates invalidate the local entry
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
 security = HTTPBearer()
+token_cache = TTLCache(max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+user_cache = TTLCache(max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -26,6 +36,9 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 def verify_token(token: str):
     """Verify JWT token and return user data"""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return dict(cached)
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -35,7 +48,11 @@ def verify_token(token: str):
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return {"user_id": user_id}
+        token_data = {"user_id": user_id}
+        # Never serve a cached token past its own expiry
+        if payload.get("exp") is not None:
+            token_cache.set(token, token_data, ttl=payload["exp"] - time.time())
+        return dict(token_data)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,15 +62,49 @@ def verify_token(token: str):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current authenticated user"""
+    return await _load_user(credentials, db)
+
+async def get_current_user_read(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get current authenticated user for read-only routes, from a replica if one is available"""
+    return await _load_user(credentials, db, fallback_to_primary=bool(replica_router.replicas))
+
+async def _load_user(credentials: HTTPAuthorizationCredentials, db: AsyncSession, fallback_to_primary: bool = False):
     token_data = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.id == token_data["user_id"]).first()
+    
+    # Cache hits return a detached copy; routes that modify the user must load it from their session
+    snapshot = user_cache.get(token_data["user_id"])
+    if snapshot is not None:
+        return User(**snapshot)
+    
+    stmt = select(User).where(User.id == token_data["user_id"])
+    user = await db.scalar(stmt)
+    if user is None and fallback_to_primary:
+        # A user created moments ago (e.g. by another worker) may not be on the replica yet
+        async with AsyncSessionLocal() as primary:
+            user = await primary.scalar(stmt)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_cache.set(user.id, {column.key: getattr(user, column.key) for column in User.__mapper__.column_attrs})
     return user
+
+def invalidate_user(user_id: str):
+    """Drop a cached user after its row changes"""
+    user_cache.invalidate(user_id)
+
+def auth_cache_stats():
+    """Hit/miss counters; user cache hits are user queries saved"""
+    return {
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "user_queries_saved": user_cache.hits,
+    }
@@ -0,0 +1,139 @@
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+from middleware.rate_limit import client_key
+from utils.idempotency import IdempotencyStore, StoredResponse
+from utils.metrics import registry
+
+IDEMPOTENCY_STORE_SIZE = int(os.getenv("IDEMPOTENCY_STORE_SIZE", "10000"))
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+# How long a duplicate waits for the original request before giving up with 409
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "30"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Only requests that create something; retrying them must not create it twice.
+# The template labels metrics for responses answered here, without the router.
+IDEMPOTENT_ROUTES = [
+    ("POST", re.compile(r"^/api/bookings/?$"), "/api/bookings/"),
+    ("POST", re.compile(r"^/api/bookings/\d+/payment$"), "/api/bookings/{booking_id}/payment"),
+]
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_STORE_SIZE, IDEMPOTENCY_TTL)
+idempotent_replays = registry.counter(
+    "idempotent_replays_total", "Requests answered from a stored idempotent response", ("outcome",)
+)
+registry.gauge("idempotency_keys", "Idempotency keys held in memory", callback=lambda: {(): len(idempotency_store)})
+
+def idempotent_route(method: str, path: str) -> Optional[str]:
+    """Route template if the request is idempotent, else None"""
+    for route_method, pattern, template in IDEMPOTENT_ROUTES:
+        if route_method == method and pattern.match(path):
+            return template
+    return None
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+async def _send_json(send, status_code: int, detail: str):
+    await send({"type": "http.response.start", "status": status_code, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+async def _replay(send, response: StoredResponse):
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": response.headers + [(b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+class IdempotencyMiddleware:
+    """Idempotency-Key support for booking and payment creation.
+
+    The first request with a key runs; retries with the same key and body get
+    its stored response back, and duplicates arriving while it runs wait for
+    it. Server errors are not stored, so a retry after one runs again. Keys
+    are scoped per client and held in memory by each worker.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = None):
+        self.app = app
+        self.store = store if store is not None else idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        template = idempotent_route(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if template is None:
+            await self.app(scope, receive, send)
+            return
+        # Replays never reach the router; give MetricsMiddleware the route anyway
+        scope["route_template"] = template
+        key = dict(scope["headers"]).get(b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        store_key = (client_key(scope), scope["method"], scope["path"], key)
+
+        while True:
+            entry, created = self.store.begin(store_key, fingerprint)
+            if created:
+                break
+            if entry.fingerprint != fingerprint:
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+                return
+            try:
+                await asyncio.wait_for(entry.done.wait(), IDEMPOTENCY_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed")
+                return
+            if entry.response is not None:
+                idempotent_replays.inc("replayed")
+                await _replay(send, entry.response)
+                return
+            # The original failed and was discarded; run it again ourselves
+            idempotent_replays.inc("retried")
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status, headers, chunks = 500, [], []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            self.store.discard(store_key, entry)
+            raise
+        if status >= 500 or status == 429:
+            self.store.discard(store_key, entry)
+        else:
+            self.store.complete(entry, StoredResponse(status, headers, b"".join(chunks)))
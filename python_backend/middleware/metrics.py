@@ -0,0 +1,64 @@
+
+import time
+from typing import Optional
+from utils.metrics import registry
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_in_flight = 0
+registry.gauge("http_requests_in_flight", "HTTP requests being handled", callback=lambda: {(): http_in_flight})
+
+def route_template(scope) -> Optional[str]:
+    """Full path template of the matched route, e.g. /api/bookings/{booking_id}.
+
+    Newer FastAPI versions match included routers without flattening them, so
+    the route's own path lacks the router prefix; the prefix is then recovered
+    from the request path as the part the route's pattern does not cover.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    pattern = getattr(route, "path_regex", None)
+    if template is None or pattern is None:
+        return template
+    path = scope["path"]
+    if not pattern.match(path):
+        for i in range(1, len(path)):
+            if path[i] == "/" and pattern.match(path[i:]):
+                return path[:i] + template
+    return template
+
+class MetricsMiddleware:
+    """Records latency and status per route template, e.g. /api/bookings/{booking_id}"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global http_in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight -= 1
+            # The router stores the matched route in the scope, middlewares that answer
+            # without it may set a route_template; unmatched paths share one label
+            route = route_template(scope) or scope.get("route_template") or "unmatched"
+            http_request_seconds.observe(time.perf_counter() - start, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status))
@@ -0,0 +1,112 @@
+
+import json
+import os
+import re
+from typing import Optional
+from fastapi import HTTPException
+from database.connection import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from middleware.auth import verify_token
+from utils.metrics import registry
+from utils.rate_limiter import AdmissionLimiter, Budget, MemoryBucketStore, RedisBucketStore
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Set to share buckets across workers; otherwise each worker counts on its own
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Only trust X-Forwarded-For behind a proxy that sets it
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+# In-flight requests are capped at what the DB pool can serve, so excess load
+# is shed up front instead of queueing on pool checkout for everyone
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+ADMISSION_MAX_WAITING = int(os.getenv("ADMISSION_MAX_WAITING", "50"))
+ADMISSION_WAIT_TIMEOUT = float(os.getenv("ADMISSION_WAIT_TIMEOUT", "2"))
+
+# First match wins: (method, path pattern, budget)
+ROUTE_BUDGETS = [
+    ("POST", re.compile(r"^/api/auth/login$"), Budget("login", rate=0.2, burst=5)),
+    ("POST", re.compile(r"^/api/bookings/\d+/payment(/verify)?$"), Budget("payment", rate=0.5, burst=5)),
+    ("POST", re.compile(r"^/api/bookings/"), Budget("booking", rate=1, burst=10)),
+    ("GET", re.compile(r"^/api/services/?$"), Budget("search", rate=5, burst=20)),
+    (None, re.compile(r"^/api/"), Budget("api", rate=20, burst=60)),
+]
+
+# Long-lived streams hold no pool connection, so they don't count as in flight
+CONCURRENCY_EXEMPT = {"/", "/health", "/metrics", "/api/services/availability/stream"}
+
+admission_limiter = AdmissionLimiter(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_WAITING, ADMISSION_WAIT_TIMEOUT)
+rate_limited = registry.counter("rate_limited_requests_total", "Requests rejected by rate limits", ("budget",))
+load_shed = registry.counter("admission_rejected_total", "Requests shed by admission control")
+registry.gauge("admission_waiting", "Requests waiting for an admission slot", callback=lambda: {(): admission_limiter.waiting})
+
+def route_budget(method: str, path: str) -> Optional[Budget]:
+    for route_method, pattern, budget in ROUTE_BUDGETS:
+        if (route_method is None or route_method == method) and pattern.match(path):
+            return budget
+    return None
+
+def client_key(scope) -> str:
+    """User id for authenticated requests, client IP otherwise"""
+    headers = dict(scope["headers"])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.lower().startswith("bearer "):
+        try:
+            return "user:" + str(verify_token(authorization[7:].strip())["user_id"])
+        except HTTPException:
+            pass
+    if RATE_LIMIT_TRUST_FORWARDED and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+async def _reject(send, status_code: int, detail: str, retry_after: float):
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(max(1, round(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+class RateLimitMiddleware:
+    """Per-client token buckets per route, then admission control on concurrency"""
+
+    def __init__(self, app, store=None, admission: AdmissionLimiter = None):
+        self.app = app
+        if store is None:
+            store = RedisBucketStore(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else MemoryBucketStore()
+        self.store = store
+        self.admission = admission or admission_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        budget = route_budget(scope["method"], path)
+        if budget is not None:
+            try:
+                allowed, retry_after = await self.store.take(f"{budget.name}:{client_key(scope)}", budget)
+            except Exception as e:
+                # A broken shared store must not take the API down with it
+                print(f"Rate limit store failed, allowing request: {e}")
+                allowed, retry_after = True, 0.0
+            if not allowed:
+                rate_limited.inc(budget.name)
+                await _reject(send, 429, "Too many requests, please slow down", retry_after)
+                return
+
+        if path in CONCURRENCY_EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.admission.acquire():
+            load_shed.inc()
+            await _reject(send, 503, "Server busy, please retry shortly", ADMISSION_WAIT_TIMEOUT)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release()
@@ -0,0 +1,132 @@
+
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from middleware.metrics import route_template
+
+SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "true").lower() == "true"
+# Debug only: exposes query counts and timings to clients
+SQL_PROFILE_HEADERS = os.getenv("SQL_PROFILE_HEADERS", "false").lower() == "true"
+# "off", "warn" (log) or "raise" (fail the request; for tests)
+SQL_QUERY_BUDGET_MODE = os.getenv("SQL_QUERY_BUDGET_MODE", "warn")
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "0.1"))
+
+_PLACEHOLDER = r"(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+")
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more queries than its declared budget"""
+
+def query_budget(max_queries: int):
+    """Declare how many SQL statements a route may run per request"""
+    def decorate(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorate
+
+def statement_shape(statement: str) -> str:
+    """Statement text with IN-list lengths and whitespace normalized away"""
+    return _PLACEHOLDER_LIST.sub("?, ...", " ".join(statement.split()))
+
+class QueryProfile:
+    def __init__(self, scope):
+        self.scope = scope
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        # Set once the response is sent; background tasks run after that
+        self.finished = False
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope) or self.scope["path"]
+
+    @property
+    def budget(self) -> Optional[int]:
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return getattr(endpoint, "query_budget", None)
+
+    def duplicates(self) -> Dict[str, int]:
+        """Statement shapes run more than once: the usual sign of an N+1"""
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("sql_profile", default=None)
+
+# Registered on the Engine class, so every engine (and the async engines'
+# sync cores) reports to the profile of the request that runs the query
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None or profile.finished:
+        return
+    profile.count += 1
+    profile.shapes[statement_shape(statement)] += 1
+    budget = profile.budget
+    if SQL_QUERY_BUDGET_MODE == "raise" and budget is not None and profile.count > budget:
+        raise QueryBudgetExceeded(
+            f"{profile.route} ran {profile.count} queries, budget is {budget}: {statement_shape(statement)}"
+        )
+    # On the execution context, so a failed statement leaves nothing behind
+    if context is not None:
+        context._profile_start = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    start = getattr(context, "_profile_start", None)
+    if profile is None or start is None:
+        return
+    profile.db_time += time.perf_counter() - start
+
+class SQLProfilerMiddleware:
+    """Per-request query count, DB time and duplicate statements"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILER_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(scope)
+        token = _current.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                profile.finished = True
+            if message["type"] == "http.response.start" and SQL_PROFILE_HEADERS:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-query-count", str(profile.count).encode()),
+                    (b"x-db-time-ms", f"{profile.db_time * 1000:.1f}".encode()),
+                    (b"x-db-duplicate-queries", str(sum(profile.duplicates().values())).encode()),
+                ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report(profile, (time.perf_counter() - start) * 1000)
+
+    def _report(self, profile: QueryProfile, elapsed_ms: float):
+        budget = profile.budget
+        if SQL_QUERY_BUDGET_MODE == "warn" and budget is not None and profile.count > budget:
+            print(f"Query budget exceeded on {profile.route}: {profile.count} queries (budget {budget})")
+        if elapsed_ms >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            print(
+                f"Slow request {profile.scope['method']} {profile.route}: {elapsed_ms:.0f} ms, "
+                f"{profile.count} queries, {profile.db_time * 1000:.0f} ms in DB"
+            )
+            for shape, count in sorted(profile.duplicates().items(), key=lambda item: -item[1])[:5]:
+                print(f"  {count}x {shape[:200]}")
@@ -0,0 +1,35 @@
+"""Composite indexes for search and booking access patterns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Search orders by rating; make it non-null so the index covers every row
+    op.execute("UPDATE services SET rating = 0 WHERE rating IS NULL")
+    with op.batch_alter_table("services") as batch:
+        batch.alter_column("rating", existing_type=sa.Numeric(2, 1), nullable=False, server_default="0")
+
+    op.create_index(
+        "ix_services_search", "services",
+        ["is_active", "type", "city", sa.text("rating DESC")]
+    )
+    op.create_index("ix_services_price", "services", ["price_per_person"])
+    op.create_index("ix_bookings_user_created", "bookings", ["user_id", "created_at"])
+    op.create_index("ix_bookings_service_date", "bookings", ["service_id", "booking_date"])
+
+def downgrade():
+    op.drop_index("ix_bookings_service_date", table_name="bookings")
+    op.drop_index("ix_bookings_user_created", table_name="bookings")
+    op.drop_index("ix_services_price", table_name="services")
+    op.drop_index("ix_services_search", table_name="services")
+    with op.batch_alter_table("services") as batch:
+        batch.alter_column("rating", existing_type=sa.Numeric(2, 1), nullable=True, server_default=None)
@@ -0,0 +1,27 @@
+"""Service coordinates and geohash index for near-me search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("services") as batch:
+        batch.add_column(sa.Column("latitude", sa.Float()))
+        batch.add_column(sa.Column("longitude", sa.Float()))
+        batch.add_column(sa.Column("geohash", sa.String(12)))
+    op.create_index("ix_services_geohash", "services", ["geohash"])
+
+def downgrade():
+    op.drop_index("ix_services_geohash", table_name="services")
+    with op.batch_alter_table("services") as batch:
+        batch.drop_column("geohash")
+        batch.drop_column("longitude")
+        batch.drop_column("latitude")
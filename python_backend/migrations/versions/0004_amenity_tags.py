@@ -0,0 +1,49 @@
+"""Normalized, indexed amenity tags for amenity filtering
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from utils.amenities import amenity_tags
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+def upgrade():
+    with op.batch_alter_table("services") as batch:
+        batch.add_column(sa.Column("amenity_tags", sa.JSON().with_variant(JSONB(), "postgresql")))
+    op.create_index("ix_services_amenity_tags", "services", ["amenity_tags"], postgresql_using="gin")
+
+    # Derive tags from the existing amenities text
+    services = sa.table(
+        "services",
+        sa.column("id", sa.Integer()),
+        sa.column("amenities", sa.Text()),
+        sa.column("amenity_tags", sa.JSON().with_variant(JSONB(), "postgresql")),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(services.c.id, services.c.amenities).where(services.c.amenities.isnot(None))
+    ).all()
+    update = (
+        services.update()
+        .where(services.c.id == sa.bindparam("service_id"))
+        .values(amenity_tags=sa.bindparam("tags"))
+    )
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        batch_rows = rows[start:start + BACKFILL_BATCH_SIZE]
+        connection.execute(update, [
+            {"service_id": row.id, "tags": amenity_tags(row.amenities)} for row in batch_rows
+        ])
+
+def downgrade():
+    op.drop_index("ix_services_amenity_tags", table_name="services")
+    with op.batch_alter_table("services") as batch:
+        batch.drop_column("amenity_tags")
@@ -0,0 +1,54 @@
+"""Per-date inventory rows for bookings made before service_inventory existed
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Holding bookings on a date that has no inventory row yet predate per-date inventory
+_LEGACY = """
+    NOT EXISTS (
+        SELECT 1 FROM service_inventory i
+        WHERE i.service_id = b.service_id AND i.date = b.booking_date
+    )
+"""
+
+def upgrade():
+    # Before per-date inventory, services.availability was a running count:
+    # verifying a payment took the seats off and cancelling put them back. We
+    # assume it still equals capacity minus the seats of confirmed legacy
+    # bookings, so add those back first to recover the capacity it now means.
+    op.execute(sa.text(f"""
+        UPDATE services
+        SET availability = COALESCE(availability, 0) + (
+            SELECT COALESCE(SUM(b.number_of_people), 0) FROM bookings b
+            WHERE b.service_id = services.id AND b.status = 'confirmed' AND {_LEGACY}
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.service_id = services.id AND b.status = 'confirmed' AND {_LEGACY}
+        )
+    """))
+    # Then seed each legacy date with that capacity minus the seats held on it.
+    # Dates that already have a row are left alone.
+    op.execute(sa.text(f"""
+        INSERT INTO service_inventory (service_id, date, available)
+        SELECT b.service_id, b.booking_date,
+               CASE WHEN COALESCE(s.availability, 0) > SUM(b.number_of_people)
+                    THEN COALESCE(s.availability, 0) - SUM(b.number_of_people) ELSE 0 END
+        FROM bookings b
+        JOIN services s ON s.id = b.service_id
+        WHERE b.status IN ('pending', 'confirmed') AND {_LEGACY}
+        GROUP BY b.service_id, b.booking_date, s.availability
+    """))
+
+def downgrade():
+    # Backfilled rows and restored capacities can't be told apart from later changes
+    pass
@@ -0,0 +1,20 @@
+"""Drop the unused bookings(service_id, booking_date) index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Per-date availability lives in service_inventory; no query reads bookings
+    # by service and date, so the index only slowed booking writes
+    op.drop_index("ix_bookings_service_date", table_name="bookings")
+
+def downgrade():
+    op.create_index("ix_bookings_service_date", "bookings", ["service_id", "booking_date"])
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.connection import Base
@@ -25,3 +25,8 @@ class Booking(Base):
     # Relationships
     user = relationship("User", backref="bookings")
     service = relationship("Service", backref="bookings")
+
+    # Booking history per user
+    __table_args__ = (
+        Index("ix_bookings_user_created", "user_id", "created_at"),
+    )
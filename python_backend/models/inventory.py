@@ -0,0 +1,17 @@
+
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database.connection import Base
+
+class ServiceInventory(Base):
+    """Units left for one service on one date.
+
+    Rows are created on first booking for a date, seeded from
+    Service.availability, which acts as the per-date capacity.
+    """
+    __tablename__ = "service_inventory"
+
+    service_id = Column(Integer, ForeignKey("services.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    available = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,6 @@
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Numeric, Float, DateTime, Boolean, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from database.connection import Base
 
@@ -7,18 +8,36 @@ class Service(Base):
     __tablename__ = "services"
 
     id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(100), unique=True, index=True)  # Partner catalog id, used for bulk upserts
     title = Column(String(255), nullable=False)
     description = Column(Text)
     type = Column(String(50), nullable=False)  # 'hotel' or 'bus'
     location = Column(String(255), nullable=False)
     city = Column(String(100), nullable=False)
     state = Column(String(100), nullable=False)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12))  # Derived from latitude/longitude for near-me search
     price_per_person = Column(Numeric(10, 2), nullable=False)
     currency = Column(String(3), default='INR')
     availability = Column(Integer, default=1)
     image_url = Column(String(500))
-    rating = Column(Numeric(2, 1), default=0)
+    rating = Column(Numeric(2, 1), default=0, server_default="0", nullable=False)
     amenities = Column(Text)  # JSON string of amenities
+    amenity_tags = Column(JSON().with_variant(JSONB(), "postgresql"))  # Normalized amenities, used for filtering
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Trigram GIN indexes back destination ILIKE / similarity search on PostgreSQL
+    __table_args__ = (
+        Index("ix_services_location_trgm", "location", postgresql_using="gin", postgresql_ops={"location": "gin_trgm_ops"}),
+        Index("ix_services_city_trgm", "city", postgresql_using="gin", postgresql_ops={"city": "gin_trgm_ops"}),
+        Index("ix_services_state_trgm", "state", postgresql_using="gin", postgresql_ops={"state": "gin_trgm_ops"}),
+        Index("ix_services_price", "price_per_person"),
+        Index("ix_services_geohash", "geohash"),
+        Index("ix_services_amenity_tags", "amenity_tags", postgresql_using="gin"),
+    )
+
+# Serves filtered search ordered by rating (see routes/services.py::search_services)
+Index("ix_services_search", Service.is_active, Service.type, Service.city, Service.rating.desc())
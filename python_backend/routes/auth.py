@@ -1,11 +1,12 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import get_async_db
 from models.user import User
 from schemas.user import UserCreate, UserResponse, Token
-from middleware.auth import create_access_token, verify_token
+from middleware.auth import create_access_token, verify_token, get_current_user as get_authenticated_user, auth_cache_stats
 import uuid
 
 router = APIRouter()
@@ -14,14 +15,14 @@ security = HTTPBearer()
 @router.post("/login", response_model=Token)
 async def login(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login with Replit Auth token"""
     # Verify the Replit token and extract user info
     user_data = verify_token(credentials.credentials)
     
     # Create or update user
-    user = db.query(User).filter(User.id == user_data["user_id"]).first()
+    user = await db.scalar(select(User).where(User.id == user_data["user_id"]))
     if not user:
         user = User(
             id=user_data["user_id"],
@@ -31,8 +32,8 @@ async def login(
             profile_image_url=user_data.get("profile_image_url")
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     
     # Create JWT token
     access_token = create_access_token(data={"sub": user.id})
@@ -46,6 +47,13 @@ async def get_current_user(
     """Get current user profile"""
     return current_user
 
+@router.get("/cache/stats")
+async def get_auth_cache_stats(current_user: User = Depends(get_authenticated_user)):
+    """Get auth cache counters and user queries saved (admin only)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return auth_cache_stats()
+
 @router.post("/logout")
 async def logout():
     """Logout user"""
@@ -1,38 +1,55 @@
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from sqlalchemy import Select, select, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from collections import defaultdict
 from datetime import date
-from database.connection import get_db
+from database.connection import get_async_db, get_read_db
 from models.booking import Booking
 from models.service import Service
 from models.user import User
-from schemas.booking import BookingCreate, BookingResponse, PaymentRequest, PaymentResponse
-from middleware.auth import get_current_user
-from services.payment_service import create_payment_order, verify_payment
-from services.email_service import send_booking_confirmation
+from schemas.booking import BookingCreate, BulkBookingCreate, BookingResponse, BookingServiceSummary, BookingWithServiceResponse, PaymentRequest, PaymentResponse
+from middleware.auth import get_current_user, get_current_user_read
+from middleware.sql_profiler import query_budget
+from services.payment_service import create_payment_order, verify_payment, create_refund, PaymentGatewayError
+from services.inventory_service import reserve_inventory, reserve_inventory_bulk, release_inventory, transition_booking, HOLDING_STATUSES
+from services.email_service import queue_booking_confirmation
+from services.availability_events import publish_availability
 from utils.currency import format_inr
+from utils.pagination import encode_cursor, decode_cursor
+from utils.serialization import ORJSONResponse, projection, rows_to_dicts
 
 router = APIRouter()
 
+# Booking lists read only the columns BookingResponse renders
+BOOKING_COLUMNS = projection(Booking, BookingResponse)
+BOOKING_KEYS = list(BookingResponse.model_fields)
+SERVICE_SUMMARY_COLUMNS = projection(Service, BookingServiceSummary)
+SERVICE_SUMMARY_KEYS = list(BookingServiceSummary.model_fields)
+
+BOOKING_STATUSES = {"pending", "confirmed", "cancelled", "expired"}
+
 @router.post("/", response_model=BookingResponse)
+@query_budget(7)
 async def create_booking(
     booking_data: BookingCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new booking"""
     # Check service availability
-    service = db.query(Service).filter(
+    service = await db.scalar(select(Service).where(
         Service.id == booking_data.service_id,
         Service.is_active == True
-    ).first()
+    ))
     
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    if service.availability < booking_data.number_of_people:
+    # Hold inventory for the booking; released on cancellation or hold expiry
+    if not await reserve_inventory(db, service.id, booking_data.booking_date, booking_data.number_of_people):
         raise HTTPException(status_code=400, detail="Insufficient availability")
     
     # Calculate total amount
@@ -49,31 +66,160 @@ async def create_booking(
     )
     
     db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    await db.refresh(booking)
+    await publish_availability(db, [(booking.service_id, booking.booking_date)])
     
     return booking
 
-@router.get("/", response_model=List[BookingResponse])
-async def get_user_bookings(
-    db: Session = Depends(get_db),
+@router.post("/bulk", response_model=List[BookingResponse])
+async def create_bulk_booking(
+    bulk_data: BulkBookingCreate,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's bookings"""
-    bookings = db.query(Booking).filter(Booking.user_id == current_user.id).all()
+    """Create many bookings atomically (group / tour operator bookings)"""
+    # One query for every service referenced by the request
+    service_ids = {item.service_id for item in bulk_data.items}
+    services = {
+        service.id: service
+        for service in (await db.scalars(select(Service).where(
+            Service.id.in_(service_ids),
+            Service.is_active == True
+        ))).all()
+    }
+    missing = sorted(service_ids - services.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Services not found: {missing}")
+    
+    # Reserve combined demand per service and date, all or nothing
+    demand = defaultdict(int)
+    for item in bulk_data.items:
+        demand[item.service_id, item.booking_date] += item.number_of_people
+    capacity = {service_id: service.availability or 0 for service_id, service in services.items()}
+    shortfalls = await reserve_inventory_bulk(db, demand, capacity)
+    if shortfalls:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Insufficient availability",
+                "items": [{"service_id": service_id, "booking_date": str(day)} for service_id, day in shortfalls]
+            }
+        )
+    
+    # Insert every booking in one batched statement
+    bookings = (await db.scalars(
+        insert(Booking).returning(Booking),
+        [
+            {
+                "user_id": current_user.id,
+                "service_id": item.service_id,
+                "booking_date": item.booking_date,
+                "number_of_people": item.number_of_people,
+                "total_amount": services[item.service_id].price_per_person * item.number_of_people,
+                "special_requests": item.special_requests
+            }
+            for item in bulk_data.items
+        ]
+    )).all()
+    await db.commit()
+    await publish_availability(db, demand)
+    
     return bookings
 
+def build_history_statement(
+    user_id: str,
+    statuses: Optional[set] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    include_service: bool = False,
+    cursor_id: Optional[int] = None
+) -> Select:
+    """A user's booking history, newest first (also planned by benchmarks.explain_check)"""
+    stmt = select(*BOOKING_COLUMNS).where(Booking.user_id == user_id)
+    if statuses:
+        stmt = stmt.where(Booking.status.in_(sorted(statuses)))
+    
+    # Date filters apply to the travel date
+    if from_date:
+        stmt = stmt.where(Booking.booking_date >= from_date)
+    if to_date:
+        stmt = stmt.where(Booking.booking_date <= to_date)
+    
+    # Service summaries come from the same query, joined in, not per booking
+    if include_service:
+        stmt = stmt.add_columns(*SERVICE_SUMMARY_COLUMNS).join(Service, Service.id == Booking.service_id)
+    
+    # Keyset pagination on (created_at, id), served by ix_bookings_user_created.
+    # The cursor holds only the id; its created_at is read back as stored, since
+    # a re-bound datetime may not compare equal to it (SQLite keeps text)
+    sort_keys = [Booking.created_at, Booking.id]
+    if cursor_id is not None:
+        cursor_created_at = (
+            select(Booking.created_at)
+            .where(Booking.id == cursor_id, Booking.user_id == user_id)
+            .scalar_subquery()
+        )
+        stmt = stmt.where(tuple_(*sort_keys) < tuple_(cursor_created_at, cursor_id))
+    return stmt.order_by(*(key.desc() for key in sort_keys))
+
+def user_booking_statement(booking_id: int, user_id: str) -> Select:
+    """One booking, only if it belongs to the user"""
+    return select(Booking).where(Booking.id == booking_id, Booking.user_id == user_id)
+
+@router.get("/", response_model=List[BookingWithServiceResponse])
+@query_budget(2)
+async def get_user_bookings(
+    status: Optional[str] = Query(None, description="Comma-separated statuses, e.g. confirmed,pending"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    include_service: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_read)
+):
+    """Get user's bookings, newest first"""
+    statuses = None
+    if status:
+        statuses = {part.strip() for part in status.split(",") if part.strip()}
+        if not statuses <= BOOKING_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Status must be one of {sorted(BOOKING_STATUSES)}")
+    cursor_id = None
+    if cursor:
+        try:
+            cursor_id = int(decode_cursor(cursor, 1)[0])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = build_history_statement(current_user.id, statuses, from_date, to_date, include_service, cursor_id)
+    
+    next_cursor = None
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    
+    results = rows_to_dicts(rows, BOOKING_KEYS)
+    if include_service:
+        offset = len(BOOKING_KEYS)
+        for result, row in zip(results, rows):
+            result["service"] = dict(zip(SERVICE_SUMMARY_KEYS, row[offset:]))
+    if has_more:
+        next_cursor = encode_cursor(results[-1]["id"])
+    return ORJSONResponse(results, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
 @router.get("/{booking_id}", response_model=BookingResponse)
+@query_budget(2)
 async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get specific booking"""
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    booking = await db.scalar(user_booking_statement(booking_id, current_user.id))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -84,14 +230,11 @@ async def get_booking(
 async def initiate_payment(
     booking_id: int,
     payment_data: PaymentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Initiate payment for booking"""
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    booking = await db.scalar(user_booking_statement(booking_id, current_user.id))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -100,16 +243,19 @@ async def initiate_payment(
         raise HTTPException(status_code=400, detail="Payment already completed")
     
     # Create payment order
-    payment_response = await create_payment_order(
-        booking_id=booking.id,
-        amount=float(booking.total_amount),
-        currency=booking.currency,
-        payment_method=payment_data.payment_method
-    )
+    try:
+        payment_response = await create_payment_order(
+            booking_id=booking.id,
+            amount=float(booking.total_amount),
+            currency=booking.currency,
+            payment_method=payment_data.payment_method
+        )
+    except PaymentGatewayError:
+        raise HTTPException(status_code=503, detail="Payment gateway unavailable, please retry shortly")
     
     # Update booking with payment ID
     booking.payment_id = payment_response["payment_id"]
-    db.commit()
+    await db.commit()
     
     return payment_response
 
@@ -118,59 +264,72 @@ async def verify_booking_payment(
     booking_id: int,
     payment_id: str,
     transaction_id: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Verify payment and confirm booking"""
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    booking = await db.scalar(user_booking_statement(booking_id, current_user.id))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    # Verify payment with gateway
-    is_verified = await verify_payment(payment_id, transaction_id)
+    # Verify payment with gateway; an unreachable gateway must not fail the booking
+    try:
+        is_verified = await verify_payment(payment_id, transaction_id)
+    except PaymentGatewayError:
+        raise HTTPException(status_code=503, detail="Payment gateway unavailable, please retry shortly")
     
     if is_verified:
-        # Update booking status
-        booking.payment_status = "completed"
-        booking.status = "confirmed"
-        booking.transaction_id = transaction_id
+        if booking.status == "confirmed":
+            return {"message": "Payment verified and booking confirmed"}
         
-        # Update service availability
-        service = db.query(Service).filter(Service.id == booking.service_id).first()
-        service.availability -= booking.number_of_people
+        confirmed = dict(status="confirmed", payment_status="completed", transaction_id=transaction_id)
+        reserved_again = False
+        # Inventory was held when the booking was created
+        if not await transition_booking(db, booking.id, ("pending",), **confirmed):
+            await db.refresh(booking)
+            if booking.status == "confirmed":
+                return {"message": "Payment verified and booking confirmed"}
+            if booking.status != "expired":
+                raise HTTPException(status_code=400, detail=f"Booking is {booking.status}")
+            
+            # The hold lapsed before payment: take inventory again or refund
+            if not await reserve_inventory(db, booking.service_id, booking.booking_date, booking.number_of_people):
+                await transition_booking(db, booking.id, ("expired",), payment_status="refunded")
+                await db.commit()
+                try:
+                    await create_refund(payment_id, float(booking.total_amount))
+                except PaymentGatewayError as e:
+                    print(f"Refund for booking {booking.id} needs manual follow-up: {e}")
+                raise HTTPException(status_code=409, detail="Service sold out while payment was pending; payment refunded")
+            if not await transition_booking(db, booking.id, ("expired",), **confirmed):
+                await db.rollback()
+                raise HTTPException(status_code=409, detail="Booking changed while confirming payment")
+            reserved_again = True
         
-        db.commit()
+        await db.refresh(booking)
+        service = await db.scalar(select(Service).where(Service.id == booking.service_id))
         
-        # Send confirmation email
-        background_tasks.add_task(
-            send_booking_confirmation,
-            user_email=current_user.email,
-            booking=booking,
-            service=service
-        )
+        # Queue confirmation email in the same transaction as the confirmation
+        await queue_booking_confirmation(db, current_user.email, booking, service)
+        await db.commit()
+        if reserved_again:
+            await publish_availability(db, [(booking.service_id, booking.booking_date)])
         
         return {"message": "Payment verified and booking confirmed"}
     else:
         booking.payment_status = "failed"
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=400, detail="Payment verification failed")
 
 @router.delete("/{booking_id}")
 async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Cancel booking"""
-    booking = db.query(Booking).filter(
-        Booking.id == booking_id,
-        Booking.user_id == current_user.id
-    ).first()
+    booking = await db.scalar(user_booking_statement(booking_id, current_user.id))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -178,13 +337,15 @@ async def cancel_booking(
     if booking.status == "cancelled":
         raise HTTPException(status_code=400, detail="Booking already cancelled")
     
-    # Update booking status
-    booking.status = "cancelled"
-    
-    # Restore service availability
-    service = db.query(Service).filter(Service.id == booking.service_id).first()
-    service.availability += booking.number_of_people
+    # Update booking status; only the request that wins the transition restores inventory
+    released = await transition_booking(db, booking.id, HOLDING_STATUSES, status="cancelled")
+    if released:
+        await release_inventory(db, booking.service_id, booking.booking_date, booking.number_of_people)
+    elif not await transition_booking(db, booking.id, ("expired",), status="cancelled"):
+        raise HTTPException(status_code=400, detail="Booking already cancelled")
     
-    db.commit()
+    await db.commit()
+    if released:
+        await publish_availability(db, [(booking.service_id, booking.booking_date)])
     
     return {"message": "Booking cancelled successfully"}
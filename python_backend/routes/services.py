@@ -1,39 +1,74 @@
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, tuple_, select, Select
 from typing import List, Optional
-from database.connection import get_db
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import asyncio
+import io
+from database.connection import get_async_db, get_read_db, AsyncSessionLocal
 from models.service import Service
 from models.user import User
 from schemas.service import ServiceResponse, ServiceSearch, ServiceCreate, ServiceUpdate
 from middleware.auth import get_current_user
+from middleware.sql_profiler import query_budget
+from services.search_index import destination_filter, service_index
+from services.search_cache import search_cache, make_search_key
+from services.search_facets import compute_facets, DEFAULT_PRICE_BUCKET_WIDTH
+from services.amenity_filter import amenity_filter
+from services.availability_events import availability_broker
+from services.geo_search import find_nearby, service_geohash, MAX_NEARBY_RADIUS_KM
+from services.inventory_service import get_calendar
+from services.catalog_import import import_services, iter_rows, detect_format
+from utils.amenities import amenity_tags, parse_amenity_list
 from utils.indian_cities import INDIAN_CITIES
+from utils.pagination import encode_cursor, decode_cursor
+from utils.serialization import ORJSONResponse, dumps, projection, rows_to_dicts
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ServiceResponse])
-async def search_services(
-    destination: Optional[str] = Query(None),
-    city: Optional[str] = Query(None),
-    state: Optional[str] = Query(None),
-    type: Optional[str] = Query(None),
-    min_price: Optional[float] = Query(None),
-    max_price: Optional[float] = Query(None),
-    rating: Optional[float] = Query(None),
-    db: Session = Depends(get_db)
+STREAM_BATCH_SIZE = 500
+
+# Search reads only the columns ServiceResponse renders
+SERVICE_COLUMNS = projection(Service, ServiceResponse)
+SERVICE_KEYS = list(ServiceResponse.model_fields)
+
+# Bounds for availability calendar requests
+MAX_CALENDAR_DAYS = 366
+MAX_CALENDAR_SERVICES = 100
+
+# Availability streams send a comment this often so proxies keep them open
+STREAM_HEARTBEAT_SECONDS = 15
+
+async def _stream_services(stmt: Select):
+    """Serialize search results as NDJSON, one batch of rows at a time"""
+    # The request-scoped session may be closed before the body is streamed
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield b"".join(dumps(row) + b"\n" for row in rows_to_dicts(partition, SERVICE_KEYS))
+
+async def _apply_filters(
+    db: AsyncSession,
+    stmt: Select,
+    destination: Optional[str],
+    city: Optional[str],
+    state: Optional[str],
+    type: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    rating: Optional[float],
+    amenities: List[str] = (),
+    amenities_match: str = "all"
 ):
-    """Search services with filters"""
-    query = db.query(Service).filter(Service.is_active == True)
-    
+    """Apply the search filters; returns the statement and any relevance sort key"""
+    relevance = None
     if destination:
-        query = query.filter(
-            or_(
-                Service.location.ilike(f"%{destination}%"),
-                Service.city.ilike(f"%{destination}%"),
-                Service.state.ilike(f"%{destination}%")
-            )
-        )
+        # Index-backed substring + typo-tolerant match, ranked ahead of rating
+        criterion, relevance = await destination_filter(db, destination)
+        stmt = stmt.where(criterion)
     
     if city:
         # Validate Indian city
@@ -42,32 +77,261 @@ async def search_services(
                 status_code=400,
                 detail=f"City '{city}' is not supported. We only serve Indian cities."
             )
-        query = query.filter(Service.city.ilike(f"%{city}%"))
+        # Cities are stored exactly as listed in INDIAN_CITIES, so equality can use the index
+        stmt = stmt.where(Service.city == city)
     
     if state:
-        query = query.filter(Service.state.ilike(f"%{state}%"))
+        stmt = stmt.where(Service.state.ilike(f"%{state}%"))
     
     if type:
         if type not in ["hotel", "bus"]:
             raise HTTPException(status_code=400, detail="Type must be 'hotel' or 'bus'")
-        query = query.filter(Service.type == type)
+        stmt = stmt.where(Service.type == type)
     
     if min_price:
-        query = query.filter(Service.price_per_person >= min_price)
+        stmt = stmt.where(Service.price_per_person >= min_price)
     
     if max_price:
-        query = query.filter(Service.price_per_person <= max_price)
+        stmt = stmt.where(Service.price_per_person <= max_price)
     
     if rating:
-        query = query.filter(Service.rating >= rating)
+        stmt = stmt.where(Service.rating >= rating)
+    
+    if amenities:
+        stmt = stmt.where(amenity_filter(db, amenities, amenities_match))
+    
+    return stmt, relevance
+
+async def build_search_statement(
+    db: AsyncSession,
+    destination: Optional[str],
+    city: Optional[str],
+    state: Optional[str],
+    type: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    rating: Optional[float],
+    amenities: List[str] = (),
+    amenities_match: str = "all",
+    cursor: Optional[str] = None
+):
+    """The ordered search statement and its sort keys (also planned by benchmarks.explain_check)"""
+    stmt, relevance = await _apply_filters(
+        db, select(*SERVICE_COLUMNS).where(Service.is_active == True),
+        destination, city, state, type, min_price, max_price, rating,
+        amenities, amenities_match
+    )
+    
+    # Keyset pagination: all sort keys descending, id as the tie-breaker
+    sort_keys = [Service.rating, Service.id]
+    if relevance is not None:
+        sort_keys.insert(0, relevance)
+    if cursor:
+        values = decode_cursor(cursor, len(sort_keys))
+        try:
+            values[-2] = Decimal(str(values[-2]))
+            values = [int(v) for v in values[:-2]] + [values[-2], int(values[-1])]
+        except (TypeError, ValueError, InvalidOperation):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(*sort_keys) < tuple_(*values))
+    
+    return stmt.order_by(*(key.desc() for key in sort_keys)), sort_keys
+
+@router.get("/", response_model=List[ServiceResponse])
+@query_budget(2)
+async def search_services(
+    destination: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    state: Optional[str] = Query(None),
+    type: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    rating: Optional[float] = Query(None),
+    amenities: Optional[str] = Query(None, description="Comma-separated amenities, e.g. wifi,pool"),
+    amenities_match: str = Query("all", pattern="^(all|any)$"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search services with filters"""
+    amenity_list = parse_amenity_list(amenities)
+    cache_key = None
+    # Read before querying, so an invalidation during the query skips the set
+    cache_generation = search_cache.generation
+    if not stream:
+        cache_key = make_search_key(
+            destination, city, state, type, min_price, max_price, rating, limit, cursor,
+            amenity_list, amenities_match
+        )
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            results, next_cursor = cached
+            return ORJSONResponse(results, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+    
+    stmt, sort_keys = await build_search_statement(
+        db, destination, city, state, type, min_price, max_price, rating,
+        amenity_list, amenities_match, cursor
+    )
+    
+    if stream:
+        if limit:
+            stmt = stmt.limit(limit)
+        return StreamingResponse(_stream_services(stmt), media_type="application/x-ndjson")
     
-    services = query.order_by(Service.rating.desc()).all()
-    return services
+    next_cursor = None
+    if not limit:
+        rows = (await db.execute(stmt)).all()
+    else:
+        # Fetch one extra row to know whether another page exists
+        rows = (await db.execute(stmt.add_columns(*sort_keys).limit(limit + 1))).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(*rows[-1][len(SERVICE_KEYS):])
+    
+    # Trusted DB rows go straight to orjson, without per-row model validation
+    results = rows_to_dicts(rows, SERVICE_KEYS)
+    search_cache.set(cache_key, results, next_cursor, cache_generation)
+    return ORJSONResponse(results, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+@router.get("/facets")
+@query_budget(2)
+async def get_search_facets(
+    destination: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    state: Optional[str] = Query(None),
+    type: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    rating: Optional[float] = Query(None),
+    amenities: Optional[str] = Query(None, description="Comma-separated amenities, e.g. wifi,pool"),
+    amenities_match: str = Query("all", pattern="^(all|any)$"),
+    price_bucket: int = Query(DEFAULT_PRICE_BUCKET_WIDTH, ge=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Facet counts for the search filter sidebar, for the same filters as search"""
+    amenity_list = parse_amenity_list(amenities)
+    stmt, _ = await _apply_filters(
+        db, select(Service.id).where(Service.is_active == True),
+        destination, city, state, type, min_price, max_price, rating,
+        amenity_list, amenities_match
+    )
+    return await compute_facets(db, stmt, price_bucket)
+
+@router.get("/nearby")
+@query_budget(6)
+async def search_nearby_services(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=MAX_NEARBY_RADIUS_KM),
+    type: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Services within radius_km of a point, or the nearest ones, sorted by distance"""
+    stmt = select(*SERVICE_COLUMNS).where(Service.is_active == True)
+    if type:
+        if type not in ["hotel", "bus"]:
+            raise HTTPException(status_code=400, detail="Type must be 'hotel' or 'bus'")
+        stmt = stmt.where(Service.type == type)
+    
+    hits = await find_nearby(db, stmt, lat, lng, radius_km, limit)
+    results = []
+    for distance, row in hits:
+        result = dict(zip(SERVICE_KEYS, row))
+        result["distance_km"] = round(distance, 3)
+        results.append(result)
+    return ORJSONResponse(results)
+
+def _calendar_range(from_date: Optional[date], to_date: Optional[date]):
+    start = from_date or date.today()
+    end = to_date or start
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_CALENDAR_DAYS} days")
+    return start, end
+
+def _availability_summary(service_id: int, calendar: List[dict]):
+    # available/count describe the first day, matching the single-day response
+    first = calendar[0]["count"]
+    return {"service_id": service_id, "available": first > 0, "count": first, "dates": calendar}
+
+def _parse_service_ids(ids: str) -> List[int]:
+    try:
+        service_ids = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not service_ids or len(service_ids) > MAX_CALENDAR_SERVICES:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_CALENDAR_SERVICES} service ids")
+    return service_ids
+
+async def _availability_events(request: Request, subscription):
+    """Server-sent events for one subscriber until the client disconnects"""
+    try:
+        yield b": subscribed\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.get(), STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": heartbeat\n\n"
+                continue
+            yield b"event: availability\ndata: " + dumps(event) + b"\n\n"
+    finally:
+        subscription.close()
+
+@router.get("/availability/stream")
+async def stream_services_availability(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated service ids")
+):
+    """Push per-date availability changes for the given services (server-sent events)"""
+    subscription = availability_broker.subscribe(_parse_service_ids(ids))
+    return StreamingResponse(
+        _availability_events(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/availability")
+@query_budget(1)
+async def get_services_availability(
+    ids: str = Query(..., description="Comma-separated service ids"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get per-date availability for several services (e.g. a page of search results)"""
+    service_ids = _parse_service_ids(ids)
+    
+    start, end = _calendar_range(from_date, to_date)
+    calendars = await get_calendar(db, service_ids, start, end)
+    return {
+        "from": start,
+        "to": end,
+        "services": [_availability_summary(service_id, calendar) for service_id, calendar in calendars.items()]
+    }
+
+@router.get("/{service_id}/availability")
+@query_budget(1)
+async def get_service_availability(
+    service_id: int,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get per-date availability for a service (defaults to today)"""
+    start, end = _calendar_range(from_date, to_date)
+    calendars = await get_calendar(db, [service_id], start, end)
+    if service_id not in calendars:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return _availability_summary(service_id, calendars[service_id])
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-async def get_service(service_id: int, db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_service(service_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get service by ID"""
-    service = db.query(Service).filter(Service.id == service_id, Service.is_active == True).first()
+    service = await db.scalar(select(Service).where(Service.id == service_id, Service.is_active == True))
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     return service
@@ -75,7 +339,7 @@ async def get_service(service_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=ServiceResponse)
 async def create_service(
     service_data: ServiceCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create new service (admin only)"""
@@ -89,12 +353,43 @@ async def create_service(
             detail=f"City '{service_data.city}' is not supported. We only serve Indian cities."
         )
     
-    service = Service(**service_data.dict())
+    service = Service(
+        **service_data.dict(),
+        geohash=service_geohash(service_data.latitude, service_data.longitude),
+        amenity_tags=amenity_tags(service_data.amenities)
+    )
     db.add(service)
-    db.commit()
-    db.refresh(service)
+    await db.commit()
+    await db.refresh(service)
+    
+    if service_index.loaded:
+        service_index.add(service.id, service.location, service.city, service.state)
+    search_cache.invalidate_new_service(service)
     return service
 
+@router.post("/import")
+async def import_service_catalog(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    chunk_size: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk import services from CSV or JSONL, upserting by external_id (admin only)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    # The upload is spooled to disk and read line by line
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    return await import_services(db, iter_rows(stream, format or detect_format(file.filename)), chunk_size)
+
+@router.get("/cache/stats")
+async def get_search_cache_stats(current_user: User = Depends(get_current_user)):
+    """Get search cache hit/miss counters (admin only)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return search_cache.stats()
+
 @router.get("/cities/list")
 async def get_supported_cities():
     """Get list of supported Indian cities"""
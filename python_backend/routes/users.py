@@ -1,28 +1,31 @@
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import get_async_db
 from models.user import User
 from schemas.user import UserResponse, UserUpdate
-from middleware.auth import get_current_user
+from middleware.auth import get_current_user, get_current_user_read, invalidate_user
 
 router = APIRouter()
 
 @router.get("/profile", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: User = Depends(get_current_user_read)):
     """Get user profile"""
     return current_user
 
 @router.put("/profile", response_model=UserResponse)
 async def update_profile(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update user profile"""
+    # current_user may be a detached copy from the auth cache
+    user = await db.get(User, current_user.id)
     for field, value in user_update.dict(exclude_unset=True).items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user(user.id)
+    return user
@@ -1,21 +1,24 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import date, datetime
-from typing import Optional
+from typing import Optional, List
 
 class BookingBase(BaseModel):
     service_id: int
     booking_date: date
-    number_of_people: int
+    number_of_people: int = Field(..., gt=0)
     special_requests: Optional[str] = None
 
 class BookingCreate(BookingBase):
     pass
 
+class BulkBookingCreate(BaseModel):
+    items: List[BookingCreate] = Field(..., min_length=1, max_length=100)
+
 class BookingUpdate(BaseModel):
     booking_date: Optional[date] = None
-    number_of_people: Optional[int] = None
+    number_of_people: Optional[int] = Field(None, gt=0)
     special_requests: Optional[str] = None
 
 class BookingResponse(BookingBase):
@@ -33,6 +36,17 @@ class BookingResponse(BookingBase):
     class Config:
         from_attributes = True
 
+class BookingServiceSummary(BaseModel):
+    id: int
+    title: str
+    type: str
+    location: str
+    city: str
+    image_url: Optional[str] = None
+
+class BookingWithServiceResponse(BookingResponse):
+    service: Optional[BookingServiceSummary] = None
+
 class PaymentRequest(BaseModel):
     booking_id: int
     payment_method: str  # 'upi', 'card', 'netbanking', 'wallet'
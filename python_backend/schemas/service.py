@@ -1,5 +1,5 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, List
@@ -11,15 +11,23 @@ class ServiceBase(BaseModel):
     location: str
     city: str
     state: str
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     price_per_person: Decimal
     currency: str = 'INR'
     availability: int = 1
     image_url: Optional[str] = None
-    rating: Optional[Decimal] = 0
+    rating: Optional[Decimal] = Decimal(0)
     amenities: Optional[str] = None
 
+    @field_validator("rating")
+    @classmethod
+    def default_rating(cls, value):
+        # services.rating is NOT NULL; an explicit null means "unrated"
+        return Decimal(0) if value is None else value
+
 class ServiceCreate(ServiceBase):
-    pass
+    external_id: Optional[str] = None
 
 class ServiceUpdate(ServiceBase):
     title: Optional[str] = None
@@ -0,0 +1,22 @@
+
+from typing import List
+from sqlalchemy import exists, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.service import Service
+
+def amenity_filter(db: AsyncSession, tags: List[str], match: str = "all"):
+    """Criterion for services offering all (or any) of the normalized tags"""
+    if db.get_bind().dialect.name == "postgresql":
+        # @> and ?| on jsonb are answered by the GIN index on amenity_tags
+        column = type_coerce(Service.amenity_tags, JSONB)
+        if match == "any":
+            return column.has_any(array(tags))
+        return column.contains(tags)
+
+    # SQLite (development) has no JSON index; json_each checks each row's tags
+    each = func.json_each(Service.amenity_tags).table_valued("value")
+    if match == "any":
+        return exists(select(1).select_from(each).where(each.c.value.in_(tags)))
+    matched = select(func.count()).select_from(each).where(each.c.value.in_(tags)).scalar_subquery()
+    return matched == len(tags)
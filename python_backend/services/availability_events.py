@@ -0,0 +1,159 @@
+
+import asyncio
+import json
+import os
+from datetime import date
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import get_async_engine
+from models.inventory import ServiceInventory
+
+# "local" delivers within this process only; "postgres" fans out across
+# workers with LISTEN/NOTIFY on the application database
+AVAILABILITY_BACKEND = os.getenv("AVAILABILITY_BACKEND", "local")
+AVAILABILITY_CHANNEL = "availability"
+
+# Slow clients lose their oldest events rather than growing memory
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("AVAILABILITY_QUEUE_SIZE", "100"))
+
+class Subscription:
+    """One client's queue of availability events for a set of services"""
+
+    def __init__(self, broker: "AvailabilityBroker", service_ids: Iterable[int]):
+        self.broker = broker
+        self.service_ids = set(service_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def put(self, event: Dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict:
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class LocalBackend:
+    """Stand-in backend: every published event is delivered in this process"""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, events: List[Dict]):
+        for event in events:
+            self.deliver(event)
+
+class PostgresNotifyBackend:
+    """Cross-worker backend over PostgreSQL LISTEN/NOTIFY.
+
+    Each worker keeps one pooled connection listening on the channel and
+    delivers what it hears, including its own notifications.
+    """
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self._listener = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        for event in json.loads(payload):
+            self.deliver(event)
+
+    async def start(self):
+        self._listener = await get_async_engine().connect()
+        raw = await self._listener.get_raw_connection()
+        await raw.driver_connection.add_listener(AVAILABILITY_CHANNEL, self._on_notify)
+
+    async def stop(self):
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+    async def publish(self, events: List[Dict]):
+        async with get_async_engine().connect() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": AVAILABILITY_CHANNEL, "payload": json.dumps(events)}
+            )
+            await conn.commit()
+
+BACKENDS = {"local": LocalBackend, "postgres": PostgresNotifyBackend}
+
+class AvailabilityBroker:
+    """In-process pub/sub of availability changes, keyed by service id"""
+
+    def __init__(self, backend: str = AVAILABILITY_BACKEND):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown availability backend '{backend}'")
+        self.backend = BACKENDS[backend](self.deliver)
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    async def start(self):
+        await self.backend.start()
+
+    async def stop(self):
+        await self.backend.stop()
+
+    def subscribe(self, service_ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(self, service_ids)
+        for service_id in subscription.service_ids:
+            self._subscribers.setdefault(service_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for service_id in subscription.service_ids:
+            subscribers = self._subscribers.get(service_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[service_id]
+
+    def has_subscribers(self, service_ids: Iterable[int]) -> bool:
+        return any(service_id in self._subscribers for service_id in service_ids)
+
+    def deliver(self, event: Dict):
+        """Hand an event to this process's subscribers of its service"""
+        for subscription in self._subscribers.get(event["service_id"], ()):
+            subscription.put(event)
+
+    async def publish(self, events: List[Dict]):
+        if events:
+            await self.backend.publish(events)
+
+
+availability_broker = AvailabilityBroker()
+
+async def publish_availability(db: AsyncSession, keys: Iterable[Tuple[int, date]]):
+    """Push current availability for (service_id, date) keys to subscribers.
+
+    Call after the change is committed so clients never see a rolled-back
+    reservation. Publishing is best effort: a failure is logged, not raised.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    # Other workers may have subscribers, so only the local backend can skip the lookup
+    local = isinstance(availability_broker.backend, LocalBackend)
+    if local and not availability_broker.has_subscribers(service_id for service_id, _ in keys):
+        return
+    try:
+        rows = (await db.execute(
+            select(ServiceInventory.service_id, ServiceInventory.date, ServiceInventory.available)
+            .where(tuple_(ServiceInventory.service_id, ServiceInventory.date).in_(keys))
+        )).all()
+        await availability_broker.publish([
+            {"service_id": service_id, "date": day.isoformat(), "available": available}
+            for service_id, day, available in rows
+        ])
+    except Exception as e:
+        print(f"Publishing availability failed: {e}")
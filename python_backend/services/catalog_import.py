@@ -0,0 +1,172 @@
+
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, TextIO
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.service import Service
+from schemas.service import ServiceCreate
+from services.geo_search import service_geohash
+from services.search_cache import search_cache
+from services.search_index import service_index
+from utils.amenities import amenity_tags
+from utils.indian_cities import INDIAN_CITIES
+
+IMPORT_CHUNK_SIZE = 1000
+
+# asyncpg allows 32767 bind parameters per statement, SQLite 32766
+MAX_BIND_PARAMETERS = 32766
+
+# Only the first errors are kept in full so memory stays bounded on bad files
+MAX_REPORTED_ERRORS = 1000
+
+SUPPORTED_CITIES = set(INDIAN_CITIES)
+UPSERT_COLUMNS = [name for name in ServiceCreate.model_fields if name != "external_id"] + ["geohash", "amenity_tags"]
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Dict]:
+    """Yield raw rows from a CSV or JSONL text stream, one line at a time"""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            # Empty CSV cells mean "not provided"
+            yield {key: value for key, value in row.items() if key and value not in ("", None)}
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield {"__error__": f"Invalid JSON: {e}"}
+                    continue
+                yield row if isinstance(row, dict) else {"__error__": "Row must be a JSON object"}
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'")
+
+def detect_format(filename: str) -> str:
+    return "csv" if (filename or "").lower().endswith(".csv") else "jsonl"
+
+def validate_row(raw: Dict) -> ServiceCreate:
+    """Validate one row against ServiceCreate and the supported city list"""
+    if "__error__" in raw:
+        raise ValueError(raw["__error__"])
+    service = ServiceCreate(**raw)
+    if service.city not in SUPPORTED_CITIES:
+        raise ValueError(f"City '{service.city}' is not supported. We only serve Indian cities.")
+    if service.type not in ("hotel", "bus"):
+        raise ValueError("Type must be 'hotel' or 'bus'")
+    return service
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        # Rows covered by the kept errors; a chunk error covers many
+        self.reported = 0
+
+    def add_error(self, row_number: int, raw: Dict, error: Exception):
+        self.failed += 1
+        if len(self.errors) >= MAX_REPORTED_ERRORS:
+            return
+        if isinstance(error, ValidationError):
+            message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+        else:
+            message = str(error)
+        self.errors.append({"row": row_number, "external_id": raw.get("external_id") if isinstance(raw, dict) else None,
+                            "error": message})
+        self.reported += 1
+
+    def add_chunk_error(self, row_numbers: List[int], error: Exception):
+        """A chunk the database rejected; none of its rows were imported"""
+        self.failed += len(row_numbers)
+        if len(self.errors) >= MAX_REPORTED_ERRORS:
+            return
+        self.errors.append({"rows": [row_numbers[0], row_numbers[-1]], "external_id": None,
+                            "error": f"Database error, chunk not imported: {getattr(error, 'orig', error)}"})
+        self.reported += len(row_numbers)
+
+    def to_dict(self) -> Dict:
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > self.reported,
+        }
+
+def _statement_batches(rows: List[Dict]) -> Iterator[List[Dict]]:
+    """Split a multi-row insert so no statement exceeds the bind parameter limit"""
+    if not rows:
+        return
+    per_statement = max(1, MAX_BIND_PARAMETERS // len(rows[0]))
+    for start in range(0, len(rows), per_statement):
+        yield rows[start:start + per_statement]
+
+async def _write_chunk(db: AsyncSession, services: List[ServiceCreate]):
+    """Multi-row insert, upserting rows that carry an external_id"""
+    keyed: Dict[str, Dict] = {}
+    unkeyed: List[Dict] = []
+    for service in services:
+        values = service.model_dump()
+        values["geohash"] = service_geohash(service.latitude, service.longitude)
+        values["amenity_tags"] = amenity_tags(service.amenities)
+        if service.external_id:
+            # Last occurrence wins; ON CONFLICT can't touch one row twice per statement
+            keyed[service.external_id] = values
+        else:
+            values.pop("external_id")
+            unkeyed.append(values)
+
+    dialect = db.get_bind().dialect.name
+    for batch in _statement_batches(list(keyed.values())):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(Service).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Service.external_id],
+            # onupdate defaults don't fire here; the search index watches updated_at
+            set_={**{column: stmt.excluded[column] for column in UPSERT_COLUMNS}, "updated_at": func.now()}
+        )
+        await db.execute(stmt)
+    for batch in _statement_batches(unkeyed):
+        await db.execute(insert(Service).values(batch))
+
+async def _commit_chunk(db: AsyncSession, chunk: List[ServiceCreate], row_numbers: List[int], report: ImportReport):
+    """Write and commit one chunk; a database error fails only this chunk"""
+    try:
+        await _write_chunk(db, chunk)
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"Catalog import chunk (rows {row_numbers[0]}-{row_numbers[-1]}) failed: {e}")
+        report.add_chunk_error(row_numbers, e)
+        return
+    report.imported += len(chunk)
+
+async def import_services(db: AsyncSession, rows: Iterable[Dict], chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict:
+    """Validate and load services chunk by chunk, committing after each chunk"""
+    report = ImportReport()
+    chunk: List[ServiceCreate] = []
+    row_numbers: List[int] = []
+
+    for row_number, raw in enumerate(rows, start=1):
+        report.processed += 1
+        try:
+            chunk.append(validate_row(raw))
+        except (ValidationError, ValueError, TypeError) as e:
+            report.add_error(row_number, raw, e)
+            continue
+        row_numbers.append(row_number)
+        if len(chunk) >= chunk_size:
+            await _commit_chunk(db, chunk, row_numbers, report)
+            chunk, row_numbers = [], []
+
+    if chunk:
+        await _commit_chunk(db, chunk, row_numbers, report)
+
+    if report.imported:
+        service_index.invalidate()
+        search_cache.clear()
+    return report.to_dict()
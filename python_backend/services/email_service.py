@@ -1,114 +1,175 @@
 
 import aiosmtplib
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
+import time
+from database.connection import AsyncSessionLocal
+from models.email_outbox import EmailOutbox
 from utils.currency import format_inr
+from utils.metrics import external_call_seconds, external_call_errors
 
 SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASS = os.getenv("SMTP_PASS", "")
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER or "noreply@travelgo.com")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
 
-async def send_email(to_email: str, subject: str, html_content: str):
-    """Send email using SMTP"""
-    if not SMTP_USER or not SMTP_PASS:
-        print("Email not configured. Skipping email send.")
-        return
-    
-    message = MIMEMultipart("alternative")
-    message["Subject"] = subject
-    message["From"] = SMTP_USER
-    message["To"] = to_email
-    
-    html_part = MIMEText(html_content, "html")
-    message.attach(html_part)
-    
-    try:
-        await aiosmtplib.send(
-            message,
+# Credentials, or an explicit host such as a local SMTP sink, enable email
+EMAIL_ENABLED = bool(SMTP_USER and SMTP_PASS) or "SMTP_HOST" in os.environ
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+
+# Templates are loaded and compiled once at import
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "email")
+template_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+booking_confirmation_template = template_env.get_template("booking_confirmation.html")
+
+class SMTPPool:
+    """A small pool of persistent, authenticated SMTP connections"""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = size
+        self._idle: asyncio.Queue = None
+        self._slots: asyncio.Semaphore = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
             hostname=SMTP_HOST,
             port=SMTP_PORT,
-            start_tls=True,
-            username=SMTP_USER,
-            password=SMTP_PASS,
+            start_tls=SMTP_STARTTLS,
+            timeout=SMTP_TIMEOUT
         )
-        print(f"Email sent successfully to {to_email}")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-
-async def send_booking_confirmation(user_email: str, booking, service):
-    """Send booking confirmation email"""
-    template = Template("""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Booking Confirmation - TravelGo</title>
-    </head>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-            <h1 style="color: #2563eb;">🎉 Booking Confirmed!</h1>
-            
-            <p>Dear Traveler,</p>
-            
-            <p>Your booking has been confirmed successfully! Here are your booking details:</p>
-            
-            <div style="background-color: #f8fafc; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                <h2 style="color: #1e40af; margin-top: 0;">Booking Details</h2>
-                <p><strong>Booking ID:</strong> #{{ booking.id }}</p>
-                <p><strong>Service:</strong> {{ service.title }}</p>
-                <p><strong>Type:</strong> {{ service.type|title }}</p>
-                <p><strong>Location:</strong> {{ service.location }}, {{ service.city }}, {{ service.state }}</p>
-                <p><strong>Date:</strong> {{ booking.booking_date }}</p>
-                <p><strong>Number of People:</strong> {{ booking.number_of_people }}</p>
-                <p><strong>Total Amount:</strong> {{ total_amount }}</p>
-                <p><strong>Transaction ID:</strong> {{ booking.transaction_id }}</p>
-                <p><strong>Payment Status:</strong> ✅ Completed</p>
-            </div>
-            
-            {% if booking.special_requests %}
-            <div style="background-color: #fef3c7; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                <h3 style="color: #92400e; margin-top: 0;">Special Requests</h3>
-                <p>{{ booking.special_requests }}</p>
-            </div>
-            {% endif %}
-            
-            <div style="background-color: #ecfdf5; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                <h3 style="color: #065f46; margin-top: 0;">💡 What's Next?</h3>
-                <ul style="margin: 0;">
-                    <li>Save this email for your records</li>
-                    <li>Carry a valid ID for verification</li>
-                    <li>Contact us if you need any assistance</li>
-                </ul>
-            </div>
-            
-            <div style="background-color: #f1f5f9; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                <h3 style="color: #475569; margin-top: 0;">📞 Need Help?</h3>
-                <p>Contact our support team:</p>
-                <p>📧 Email: support@travelgo.com</p>
-                <p>📱 Phone: +91-1234567890</p>
-                <p>🕒 Available 24/7</p>
-            </div>
-            
-            <p>Thank you for choosing TravelGo! We hope you have a wonderful journey.</p>
-            
-            <div style="border-top: 1px solid #e2e8f0; padding-top: 20px; margin-top: 30px; text-align: center; color: #64748b;">
-                <p>TravelGo - Your Ultimate Travel Companion</p>
-                <p>Making travel dreams come true across India 🇮🇳</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """)
-    
-    html_content = template.render(
+        await client.connect()
+        if SMTP_USER and SMTP_PASS:
+            await client.login(SMTP_USER, SMTP_PASS)
+        return client
+
+    @asynccontextmanager
+    async def connection(self):
+        if self._slots is None:
+            self._idle = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            client = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if candidate.is_connected:
+                    client = candidate
+                    break
+            if client is None:
+                client = await self._connect()
+            try:
+                yield client
+            except Exception:
+                # Drop connections that failed mid-send; the next use reconnects
+                client.close()
+                raise
+            else:
+                self._idle.put_nowait(client)
+
+    async def close(self):
+        while self._idle is not None and not self._idle.empty():
+            client = self._idle.get_nowait()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+smtp_pool = SMTPPool()
+
+def build_message(to_email: str, subject: str, html_content: str) -> MIMEMultipart:
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = SMTP_FROM
+    message["To"] = to_email
+    message.attach(MIMEText(html_content, "html"))
+    return message
+
+async def queue_email(db: AsyncSession, to_email: str, subject: str, html_content: str):
+    """Add an email to the outbox; it is sent once the caller's transaction commits"""
+    if not EMAIL_ENABLED:
+        print("Email not configured. Skipping email send.")
+        return
+    if not to_email:
+        return
+    db.add(EmailOutbox(to_email=to_email, subject=subject, html_content=html_content))
+
+async def queue_booking_confirmation(db: AsyncSession, user_email: str, booking, service):
+    """Queue booking confirmation email"""
+    html_content = booking_confirmation_template.render(
         booking=booking,
         service=service,
         total_amount=format_inr(float(booking.total_amount))
     )
-    
+
     subject = f"🎉 Booking Confirmed - {service.title} (#{booking.id})"
-    
-    await send_email(user_email, subject, html_content)
+
+    await queue_email(db, user_email, subject, html_content)
+
+async def _send(entry: EmailOutbox, now: datetime):
+    start = time.perf_counter()
+    try:
+        async with smtp_pool.connection() as client:
+            await client.send_message(build_message(entry.to_email, entry.subject, entry.html_content))
+        entry.status = "sent"
+        entry.sent_at = now
+        entry.last_error = None
+    except Exception as e:
+        external_call_errors.inc("smtp", "send", type(e).__name__)
+        entry.attempts += 1
+        entry.last_error = str(e)
+        if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+            entry.status = "failed"
+            print(f"Giving up on email {entry.id} to {entry.to_email}: {e}")
+        else:
+            backoff = min(OUTBOX_BACKOFF_SECONDS * 2 ** (entry.attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS)
+            entry.next_attempt_at = now + timedelta(seconds=backoff)
+    finally:
+        external_call_seconds.observe(time.perf_counter() - start, "smtp", "send")
+
+async def deliver_outbox_batch(db: AsyncSession) -> int:
+    """Send one batch of due outbox emails over the pooled connections"""
+    now = datetime.now(timezone.utc)
+    # SKIP LOCKED lets several workers drain the outbox without double sends
+    entries = (await db.scalars(
+        select(EmailOutbox)
+        .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )).all()
+    if not entries:
+        return 0
+
+    await asyncio.gather(*(_send(entry, now) for entry in entries))
+    await db.commit()
+    return sum(1 for entry in entries if entry.status == "sent")
+
+async def run_outbox_worker():
+    """Background loop draining the email outbox"""
+    if not EMAIL_ENABLED:
+        return
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                sent = await deliver_outbox_batch(db)
+            if sent:
+                print(f"Sent {sent} queued emails")
+                continue
+        except Exception as e:
+            print(f"Email outbox delivery failed: {e}")
+        await asyncio.sleep(OUTBOX_POLL_INTERVAL)
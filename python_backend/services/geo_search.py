@@ -0,0 +1,59 @@
+
+import os
+from typing import List, Optional, Tuple
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.service import Service
+from utils.geohash import covering_cells, encode, haversine_km, prefix_upper_bound
+
+# Nearest-k search widens its radius from here until enough services are found
+NEAREST_START_RADIUS_KM = 5.0
+MAX_NEARBY_RADIUS_KM = float(os.getenv("MAX_NEARBY_RADIUS_KM", "500"))
+
+def service_geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Value for services.geohash; services without coordinates have none"""
+    if latitude is None or longitude is None:
+        return None
+    return encode(latitude, longitude)
+
+def within_cells(latitude: float, longitude: float, radius_km: float):
+    """Criterion matching services in the geohash cells around a point.
+
+    Each cell is a prefix range on the indexed geohash column, so the
+    database reads a handful of index ranges instead of every row.
+    """
+    return or_(*(
+        and_(Service.geohash >= prefix, Service.geohash < prefix_upper_bound(prefix))
+        for prefix in covering_cells(latitude, longitude, radius_km)
+    ))
+
+async def find_nearby(
+    db: AsyncSession,
+    stmt: Select,
+    latitude: float,
+    longitude: float,
+    radius_km: Optional[float],
+    limit: int
+) -> List[Tuple[float, tuple]]:
+    """(distance_km, row) pairs for `stmt` rows near a point, nearest first.
+
+    With a radius, returns up to `limit` services inside it. Without one,
+    returns the `limit` nearest services within MAX_NEARBY_RADIUS_KM.
+    """
+    stmt = stmt.add_columns(Service.latitude, Service.longitude)
+    radius = radius_km or NEAREST_START_RADIUS_KM
+    while True:
+        rows = (await db.execute(stmt.where(within_cells(latitude, longitude, radius)))).all()
+        # Cells are coarser than the circle; keep only rows actually inside it
+        hits = []
+        for row in rows:
+            distance = haversine_km(latitude, longitude, row[-2], row[-1])
+            if distance <= radius:
+                hits.append((distance, row))
+        # Anything not yet seen is farther than `radius`, so k hits are the k nearest
+        if radius_km or len(hits) >= limit or radius >= MAX_NEARBY_RADIUS_KM:
+            break
+        radius = min(radius * 4, MAX_NEARBY_RADIUS_KM)
+
+    hits.sort(key=lambda hit: hit[0])
+    return hits[:limit]
@@ -0,0 +1,199 @@
+
+import asyncio
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import update, select, literal, and_, exists, tuple_, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import AsyncSessionLocal
+from services.availability_events import publish_availability
+from models.booking import Booking
+from models.inventory import ServiceInventory
+from models.service import Service
+
+# Pending bookings hold inventory until paid, for at most this long
+BOOKING_HOLD_MINUTES = int(os.getenv("BOOKING_HOLD_MINUTES", "15"))
+HOLD_SWEEP_INTERVAL = int(os.getenv("HOLD_SWEEP_INTERVAL", "60"))
+
+# Booking statuses that currently hold inventory
+HOLDING_STATUSES = ("pending", "confirmed")
+
+# Inactive services can't be booked, even on dates that already have a row
+_SERVICE_ACTIVE = exists().where(Service.id == ServiceInventory.service_id, Service.is_active == True)
+
+def _insert(db: AsyncSession):
+    dialect = db.get_bind().dialect.name
+    return (postgresql if dialect == "postgresql" else sqlite).insert(ServiceInventory)
+
+async def ensure_inventory_rows(db: AsyncSession, service_id: int, dates: Iterable[date]):
+    """Create missing per-date rows for a service, seeded from its capacity"""
+    for day in set(dates):
+        await db.execute(
+            _insert(db)
+            .from_select(
+                ["service_id", "date", "available"],
+                select(Service.id, literal(day), Service.availability).where(Service.id == service_id)
+            )
+            .on_conflict_do_nothing()
+        )
+
+async def reserve_inventory(db: AsyncSession, service_id: int, booking_date: date, quantity: int) -> bool:
+    """Atomically take `quantity` units on a date; False if not enough are left.
+
+    A single conditional UPDATE on the date's row, so concurrent reservations
+    can never oversell. The caller commits as part of its own transaction.
+    """
+    # A negative quantity would pass the availability check and add units
+    if quantity <= 0:
+        return False
+    await ensure_inventory_rows(db, service_id, [booking_date])
+    result = await db.execute(
+        update(ServiceInventory)
+        .where(
+            ServiceInventory.service_id == service_id,
+            ServiceInventory.date == booking_date,
+            ServiceInventory.available >= quantity,
+            _SERVICE_ACTIVE
+        )
+        .values(available=ServiceInventory.available - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+async def reserve_inventory_bulk(
+    db: AsyncSession,
+    demand: Dict[Tuple[int, date], int],
+    capacity: Dict[int, int]
+) -> List[Tuple[int, date]]:
+    """Reserve units for many (service_id, date) keys in a constant number of statements.
+
+    Returns the keys that lack availability or ask for no units; nothing is reserved in that
+    case and the caller should roll back. `capacity` seeds missing date rows.
+    """
+    keys = sorted(demand)
+    invalid = [key for key in keys if demand[key] <= 0]
+    if invalid:
+        return invalid
+
+    # One multi-row insert for dates that have never been booked
+    await db.execute(
+        _insert(db)
+        .values([
+            {"service_id": service_id, "date": day, "available": capacity[service_id]}
+            for service_id, day in keys
+        ])
+        .on_conflict_do_nothing()
+    )
+
+    # Lock every affected row in a fixed order so concurrent bulk requests can't deadlock
+    rows = (await db.execute(
+        select(ServiceInventory.service_id, ServiceInventory.date, ServiceInventory.available)
+        .where(tuple_(ServiceInventory.service_id, ServiceInventory.date).in_(keys), _SERVICE_ACTIVE)
+        .order_by(ServiceInventory.service_id, ServiceInventory.date)
+        .with_for_update()
+    )).all()
+    available = {(service_id, day): count for service_id, day, count in rows}
+    shortfalls = [key for key in keys if available.get(key, 0) < demand[key]]
+    if shortfalls:
+        return shortfalls
+
+    # Core executemany on the table: an ORM update() with a parameter list
+    # would be treated as a bulk UPDATE by primary key
+    inventory = ServiceInventory.__table__
+    await (await db.connection()).execute(
+        update(inventory)
+        .where(
+            inventory.c.service_id == bindparam("key_service_id"),
+            inventory.c.date == bindparam("key_date"),
+            inventory.c.available >= bindparam("quantity"),
+            _SERVICE_ACTIVE
+        )
+        .values(available=inventory.c.available - bindparam("quantity")),
+        [{"key_service_id": service_id, "key_date": day, "quantity": demand[service_id, day]} for service_id, day in keys]
+    )
+    return []
+
+async def release_inventory(db: AsyncSession, service_id: int, booking_date: date, quantity: int):
+    """Atomically give `quantity` units back to a service on a date"""
+    await db.execute(
+        update(ServiceInventory)
+        .where(ServiceInventory.service_id == service_id, ServiceInventory.date == booking_date)
+        .values(available=ServiceInventory.available + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+async def get_calendar(db: AsyncSession, service_ids: List[int], start: date, end: date) -> Dict[int, List[Dict]]:
+    """Per-date availability for several active services in one query.
+
+    Dates without an inventory row have not been booked yet and report the
+    service's full capacity.
+    """
+    rows = (await db.execute(
+        select(Service.id, Service.availability, ServiceInventory.date, ServiceInventory.available)
+        .outerjoin(ServiceInventory, and_(
+            ServiceInventory.service_id == Service.id,
+            ServiceInventory.date >= start,
+            ServiceInventory.date <= end
+        ))
+        .where(Service.id.in_(service_ids), Service.is_active == True)
+    )).all()
+
+    capacity: Dict[int, int] = {}
+    booked: Dict[int, Dict[date, int]] = defaultdict(dict)
+    for service_id, availability, day, available in rows:
+        capacity[service_id] = availability or 0
+        if day is not None:
+            booked[service_id][day] = available
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return {
+        service_id: [
+            {"date": day, "count": booked[service_id].get(day, capacity[service_id])}
+            for day in days
+        ]
+        for service_id in capacity
+    }
+
+async def transition_booking(db: AsyncSession, booking_id: int, from_statuses, **values) -> bool:
+    """Move a booking to new values only if its status is still one of from_statuses"""
+    result = await db.execute(
+        update(Booking)
+        .where(Booking.id == booking_id, Booking.status.in_(from_statuses))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+async def release_expired_holds(db: AsyncSession) -> int:
+    """Expire unpaid pending bookings older than the hold window and release their inventory"""
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=BOOKING_HOLD_MINUTES)
+    expired = (await db.execute(
+        update(Booking)
+        .where(Booking.status == "pending", Booking.created_at < cutoff)
+        .values(status="expired")
+        .returning(Booking.service_id, Booking.booking_date, Booking.number_of_people)
+        .execution_options(synchronize_session=False)
+    )).all()
+
+    released = defaultdict(int)
+    for service_id, booking_date, number_of_people in expired:
+        released[service_id, booking_date] += number_of_people
+    for (service_id, booking_date), quantity in released.items():
+        await release_inventory(db, service_id, booking_date, quantity)
+    await db.commit()
+    await publish_availability(db, released)
+    return len(expired)
+
+async def run_hold_expiry():
+    """Background loop that periodically releases lapsed booking holds"""
+    while True:
+        await asyncio.sleep(HOLD_SWEEP_INTERVAL)
+        try:
+            async with AsyncSessionLocal() as db:
+                count = await release_expired_holds(db)
+            if count:
+                print(f"Released {count} expired booking holds")
+        except Exception as e:
+            print(f"Booking hold expiry failed: {e}")
@@ -1,15 +1,85 @@
 
-import razorpay
+import httpx
 import os
+import time
 from typing import Dict
 import uuid
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import external_call_seconds, external_call_errors
 
-# Initialize Razorpay client
+# Razorpay REST API, called with a pooled async client so a slow gateway
+# never blocks the event loop
 RAZORPAY_KEY = os.getenv("RAZORPAY_KEY", "test_key")
 RAZORPAY_SECRET = os.getenv("RAZORPAY_SECRET", "test_secret")
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com/v1")
 UPI_MERCHANT_ID = os.getenv("UPI_MERCHANT_ID", "809674639-2@ybl")
 
-client = razorpay.Client(auth=(RAZORPAY_KEY, RAZORPAY_SECRET))
+PAYMENT_TIMEOUT = float(os.getenv("PAYMENT_TIMEOUT", "5"))
+PAYMENT_MAX_CONNECTIONS = int(os.getenv("PAYMENT_MAX_CONNECTIONS", "20"))
+
+# Development keys can't reach Razorpay, so fall back to mock payments
+PAYMENT_MOCK_FALLBACK = os.getenv("PAYMENT_MOCK_FALLBACK", str(RAZORPAY_KEY == "test_key")).lower() == "true"
+
+class PaymentGatewayError(Exception):
+    """The payment gateway is unavailable, timed out or returned a server error"""
+
+gateway_breaker = CircuitBreaker(
+    "razorpay",
+    failure_threshold=int(os.getenv("PAYMENT_BREAKER_THRESHOLD", "5")),
+    recovery_timeout=float(os.getenv("PAYMENT_BREAKER_RECOVERY", "30"))
+)
+
+client = httpx.AsyncClient(
+    base_url=RAZORPAY_BASE_URL,
+    auth=(RAZORPAY_KEY, RAZORPAY_SECRET),
+    timeout=httpx.Timeout(PAYMENT_TIMEOUT, connect=min(PAYMENT_TIMEOUT, 2.0)),
+    limits=httpx.Limits(max_connections=PAYMENT_MAX_CONNECTIONS, max_keepalive_connections=PAYMENT_MAX_CONNECTIONS)
+)
+
+def _is_gateway_failure(exc: Exception) -> bool:
+    # Client errors (bad request, unknown payment) say nothing about gateway health
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return True
+
+def _operation(method: str, path: str) -> str:
+    # Ids in odd path segments would make every payment its own metric series
+    parts = path.strip("/").split("/")
+    return method + " /" + "/".join("{id}" if i % 2 else part for i, part in enumerate(parts))
+
+def _error_reason(exc: Exception) -> str:
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"http_{exc.response.status_code}"
+    return "connection"
+
+async def _request(method: str, path: str, **kwargs) -> Dict:
+    async def send():
+        response = await client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    operation = _operation(method, path)
+    start = time.perf_counter()
+    try:
+        return await gateway_breaker.call(send, is_failure=_is_gateway_failure)
+    except httpx.HTTPStatusError as e:
+        external_call_errors.inc("razorpay", operation, _error_reason(e))
+        # Only genuine 4xx responses reach the caller as-is; 5xx and 429 are outages
+        if _is_gateway_failure(e):
+            raise PaymentGatewayError(str(e)) from e
+        raise
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        external_call_errors.inc("razorpay", operation, _error_reason(e))
+        raise PaymentGatewayError(str(e)) from e
+    finally:
+        external_call_seconds.observe(time.perf_counter() - start, "razorpay", operation)
+
+async def close_payment_client():
+    await client.aclose()
 
 async def create_payment_order(
     booking_id: int,
@@ -21,7 +91,7 @@ async def create_payment_order(
     try:
         # Convert amount to paise (Razorpay uses smallest currency unit)
         amount_paise = int(amount * 100)
-        
+
         # Create Razorpay order
         order_data = {
             "amount": amount_paise,
@@ -32,19 +102,19 @@ async def create_payment_order(
                 "payment_method": payment_method
             }
         }
-        
+
         if payment_method == "upi":
             # For UPI payments, add merchant details
             order_data["method"] = "upi"
             order_data["vpa"] = UPI_MERCHANT_ID
-        
-        order = client.order.create(data=order_data)
-        
+
+        order = await _request("POST", "/orders", json=order_data)
+
         # Generate payment URL for different methods
         payment_url = None
         if payment_method == "upi":
             payment_url = f"upi://pay?pa={UPI_MERCHANT_ID}&pn=TravelGo&am={amount}&cu=INR&tn=Booking%20{booking_id}"
-        
+
         return {
             "payment_id": order["id"],
             "payment_url": payment_url,
@@ -53,9 +123,13 @@ async def create_payment_order(
             "currency": currency,
             "payment_method": payment_method
         }
-        
+
     except Exception as e:
         print(f"Payment order creation failed: {e}")
+        if not PAYMENT_MOCK_FALLBACK:
+            if isinstance(e, PaymentGatewayError):
+                raise
+            raise PaymentGatewayError(str(e)) from e
         # Return mock response for development
         return {
             "payment_id": f"pay_mock_{uuid.uuid4().hex[:10]}",
@@ -68,39 +142,45 @@ async def create_payment_order(
 
 async def verify_payment(payment_id: str, transaction_id: str) -> bool:
     """Verify payment with Razorpay"""
+    # For development/testing, mock payments never reach the gateway
+    if PAYMENT_MOCK_FALLBACK and payment_id.startswith("pay_mock_"):
+        return True
+
     try:
         # Fetch payment details
-        payment = client.payment.fetch(payment_id)
-        
+        payment = await _request("GET", f"/payments/{payment_id}")
+
         # Check if payment is captured and successful
         if payment["status"] == "captured":
             return True
-        
+
         return False
-        
-    except Exception as e:
+
+    except httpx.HTTPStatusError as e:
+        # Unknown or invalid payment
         print(f"Payment verification failed: {e}")
-        # For development/testing, return True for mock payments
-        if payment_id.startswith("pay_mock_"):
-            return True
         return False
 
 async def create_refund(payment_id: str, amount: float = None) -> Dict:
     """Create refund for a payment"""
     try:
-        refund_data = {"payment_id": payment_id}
+        refund_data = {}
         if amount:
             refund_data["amount"] = int(amount * 100)  # Convert to paise
-        
-        refund = client.payment.refund(payment_id, refund_data)
+
+        refund = await _request("POST", f"/payments/{payment_id}/refund", json=refund_data)
         return {
             "refund_id": refund["id"],
             "status": refund["status"],
             "amount": refund["amount"] / 100  # Convert back to rupees
         }
-        
+
     except Exception as e:
         print(f"Refund creation failed: {e}")
+        if not PAYMENT_MOCK_FALLBACK:
+            if isinstance(e, PaymentGatewayError):
+                raise
+            raise PaymentGatewayError(str(e)) from e
         return {
             "refund_id": f"rfnd_mock_{uuid.uuid4().hex[:10]}",
             "status": "processed",
@@ -0,0 +1,105 @@
+
+import os
+import threading
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from utils.ttl_cache import TTLCache
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+
+class SearchKey(NamedTuple):
+    destination: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    type: Optional[str]
+    min_price: Optional[float]
+    max_price: Optional[float]
+    rating: Optional[float]
+    limit: Optional[int]
+    cursor: Optional[str]
+    amenities: Tuple[str, ...] = ()
+    amenities_match: str = "all"
+
+def make_search_key(destination=None, city=None, state=None, type=None, min_price=None,
+                    max_price=None, rating=None, limit=None, cursor=None,
+                    amenities=(), amenities_match="all") -> SearchKey:
+    """Normalize search filters so equivalent requests share a cache entry"""
+    def text(value):
+        value = " ".join((value or "").lower().split())
+        return value or None
+
+    # City is matched exactly against the supported list, so keep its case.
+    # search_services ignores falsy numeric filters, so 0 means "unset".
+    return SearchKey(
+        text(destination), city or None, text(state), type or None,
+        min_price or None, max_price or None, rating or None, limit, cursor or None,
+        tuple(sorted(amenities or ())), amenities_match
+    )
+
+class SearchCache:
+    """Search results held in a TTLCache as (results, next_cursor).
+
+    Every invalidation bumps the generation. A search reads it before
+    querying and passes it to set, so results computed before an
+    invalidation are not cached after it.
+    """
+
+    def __init__(self, max_size: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._cache = TTLCache(max_size, ttl)
+
+    def get(self, key: SearchKey) -> Optional[Tuple[List, Optional[str]]]:
+        """Return (results, next_cursor) or None on a miss"""
+        return self._cache.get(key)
+
+    def set(self, key: SearchKey, results: List, next_cursor: Optional[str] = None,
+            generation: Optional[int] = None):
+        """Cache results, unless the cache was invalidated since `generation` was read"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._cache.set(key, (results, next_cursor))
+
+    def invalidate_new_service(self, service):
+        """Evict cached searches a newly created service could appear in"""
+        with self._lock:
+            self.generation += 1
+            for key in self._cache.keys():
+                if _could_match(key, service):
+                    self._cache.invalidate(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict:
+        return {**self._cache.stats(), "generation": self.generation}
+
+def _could_match(key: SearchKey, service) -> bool:
+    """Conservative check of a service against cached filters (never a false negative)"""
+    if key.type and service.type != key.type:
+        return False
+    if key.city and key.city.lower() not in (service.city or "").lower():
+        return False
+    if key.state and key.state not in (service.state or "").lower():
+        return False
+    price = Decimal(str(service.price_per_person))
+    if key.min_price and price < Decimal(str(key.min_price)):
+        return False
+    if key.max_price and price > Decimal(str(key.max_price)):
+        return False
+    if key.rating and Decimal(str(service.rating or 0)) < Decimal(str(key.rating)):
+        return False
+    if key.amenities:
+        tags = set(service.amenity_tags or ())
+        if key.amenities_match == "any" and not tags.intersection(key.amenities):
+            return False
+        if key.amenities_match == "all" and not tags.issuperset(key.amenities):
+            return False
+    # Destination matching is typo tolerant, so any destination may match
+    return True
+
+search_cache = SearchCache()
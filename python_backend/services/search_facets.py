@@ -0,0 +1,53 @@
+
+from collections import Counter
+from typing import Dict
+from sqlalchemy import Integer, Select, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.service import Service
+
+DEFAULT_PRICE_BUCKET_WIDTH = 1000
+
+def _floor(expr, dialect: str):
+    # CAST rounds numerics on PostgreSQL but truncates on SQLite
+    if dialect == "postgresql":
+        return cast(func.floor(expr), Integer)
+    return cast(expr, Integer)
+
+async def compute_facets(db: AsyncSession, stmt: Select, price_bucket_width: int = DEFAULT_PRICE_BUCKET_WIDTH) -> Dict:
+    """Type, city, rating and price counts for the services matched by `stmt`.
+
+    One GROUP BY over (type, city, rating bucket, price bucket) gives every
+    combination in a single pass; the per-facet counts are rolled up here,
+    which stays small since the number of combinations is bounded.
+    """
+    dialect = db.get_bind().dialect.name
+    rating_bucket = _floor(Service.rating, dialect)
+    price_bucket = _floor(Service.price_per_person / price_bucket_width, dialect)
+    rows = (await db.execute(
+        stmt.with_only_columns(Service.type, Service.city, rating_bucket, price_bucket, func.count())
+        .group_by(Service.type, Service.city, rating_bucket, price_bucket)
+    )).all()
+
+    types, cities, ratings, prices = Counter(), Counter(), Counter(), Counter()
+    for service_type, city, rating, price, count in rows:
+        types[service_type] += count
+        cities[city] += count
+        ratings[rating] += count
+        prices[price] += count
+
+    return {
+        "total": sum(types.values()),
+        "types": dict(types.most_common()),
+        "cities": dict(cities.most_common()),
+        "ratings": [
+            {"from": bucket, "to": min(bucket + 1, 5), "count": ratings[bucket]}
+            for bucket in sorted(ratings, reverse=True)
+        ],
+        "price_histogram": {
+            "bucket_width": price_bucket_width,
+            "buckets": [
+                {"from": bucket * price_bucket_width, "to": (bucket + 1) * price_bucket_width, "count": prices[bucket]}
+                for bucket in sorted(prices)
+            ]
+        }
+    }
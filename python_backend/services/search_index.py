@@ -0,0 +1,216 @@
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import or_, case, literal, false, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.service import Service
+
+# Relevance tiers used to rank destination matches ahead of rating
+EXACT_MATCH = 2
+FUZZY_MATCH = 1
+
+# Same default as pg_trgm's word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+# How often a loaded index checks the services table for writes it didn't
+# see (other workers, import_catalog.py) and reloads if there are any
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "30"))
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+def word_trigrams(word: str) -> Set[str]:
+    """Trigrams of a single word, padded the way pg_trgm pads them"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def substring_trigrams(text: str) -> Set[str]:
+    """Unpadded trigrams; every substring match must contain all of them"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """In-process trigram index over service location, city and state.
+
+    Used on databases without pg_trgm (SQLite in development) so destination
+    search doesn't degrade into a full scan of the services table. Trigrams
+    are indexed over the distinct field values and words rather than per
+    service, since catalogs repeat the same cities and areas many times.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+        self._docs: Dict[int, Tuple[Tuple[str, ...], Set[str]]] = {}
+        self._value_ids: Dict[str, Set[int]] = {}
+        self._word_ids: Dict[str, Set[int]] = {}
+        self._value_postings: Dict[str, Set[str]] = {}
+        self._word_postings: Dict[str, Set[str]] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, rows: Iterable[Tuple[int, str, str, str]]):
+        """Rebuild the index from (id, location, city, state) rows"""
+        with self._lock:
+            for store in (self._docs, self._value_ids, self._word_ids, self._value_postings, self._word_postings):
+                store.clear()
+            for row in rows:
+                self._add(*row)
+            self._loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Load the index, or reload it if the services table changed since"""
+        if self._loaded and time.monotonic() - self._checked_at < SEARCH_INDEX_REFRESH_SECONDS:
+            return
+        # Row count, newest id and last update cover inserts, upserts and edits
+        version = tuple((await db.execute(
+            select(func.count(), func.max(Service.id), func.max(Service.updated_at))
+        )).one())
+        self._checked_at = time.monotonic()
+        if self._loaded and version == self._version:
+            return
+        stmt = select(Service.id, Service.location, Service.city, Service.state)
+        result = await db.stream(stmt.execution_options(yield_per=5000))
+        self.load([tuple(row) async for row in result])
+        self._version = version
+
+    def invalidate(self):
+        """Force a rebuild on next use, e.g. after a bulk import"""
+        self._loaded = False
+
+    def add(self, service_id: int, location: str, city: str, state: str):
+        with self._lock:
+            self._remove(service_id)
+            self._add(service_id, location, city, state)
+
+    def remove(self, service_id: int):
+        with self._lock:
+            self._remove(service_id)
+
+    def _add(self, service_id: int, location: str, city: str, state: str):
+        values = tuple({_normalize(field) for field in (location, city, state)})
+        words = {word for value in values for word in value.replace(",", " ").split()}
+        self._docs[service_id] = (values, words)
+
+        for value in values:
+            if value not in self._value_ids:
+                self._value_ids[value] = set()
+                for trigram in substring_trigrams(value):
+                    self._value_postings.setdefault(trigram, set()).add(value)
+            self._value_ids[value].add(service_id)
+
+        for word in words:
+            if word not in self._word_ids:
+                self._word_ids[word] = set()
+                for trigram in word_trigrams(word):
+                    self._word_postings.setdefault(trigram, set()).add(word)
+            self._word_ids[word].add(service_id)
+
+    def _remove(self, service_id: int):
+        doc = self._docs.pop(service_id, None)
+        if doc is None:
+            return
+        values, words = doc
+        self._discard(values, self._value_ids, self._value_postings, substring_trigrams, service_id)
+        self._discard(words, self._word_ids, self._word_postings, word_trigrams, service_id)
+
+    @staticmethod
+    def _discard(keys, ids_by_key, postings, trigrams_of, service_id):
+        for key in keys:
+            ids = ids_by_key[key]
+            ids.discard(service_id)
+            if ids:
+                continue
+            del ids_by_key[key]
+            for trigram in trigrams_of(key):
+                entries = postings[trigram]
+                entries.discard(key)
+                if not entries:
+                    del postings[trigram]
+
+    def search(self, term: str) -> Dict[int, int]:
+        """Return {service_id: relevance tier} for substring and typo-tolerant matches"""
+        term = _normalize(term)
+        if not term:
+            return {}
+
+        with self._lock:
+            # Substring matches: intersect value posting lists, then confirm
+            if len(term) >= 3:
+                postings = sorted(
+                    (self._value_postings.get(t, set()) for t in substring_trigrams(term)),
+                    key=len
+                )
+                candidates = set.intersection(*postings)
+            else:
+                candidates = self._value_ids.keys()
+            exact: Set[int] = set()
+            for value in candidates:
+                if term in value:
+                    exact.update(self._value_ids[value])
+
+            # Fuzzy matches: score vocabulary words by shared trigrams
+            fuzzy: Set[int] = set()
+            for word in term.split():
+                query = word_trigrams(word)
+                counts = Counter()
+                for trigram in query:
+                    counts.update(self._word_postings.get(trigram, ()))
+                for candidate, shared in counts.items():
+                    if shared / (len(query) + len(word_trigrams(candidate)) - shared) >= SIMILARITY_THRESHOLD:
+                        fuzzy.update(self._word_ids[candidate])
+
+            matches = dict.fromkeys(fuzzy - exact, FUZZY_MATCH)
+            matches.update(dict.fromkeys(exact, EXACT_MATCH))
+            return matches
+
+    def scan(self, term: str) -> List[int]:
+        """Brute-force substring scan, kept for benchmarking against search()"""
+        term = _normalize(term)
+        return [service_id for service_id, (values, _) in self._docs.items() if any(term in value for value in values)]
+
+service_index = TrigramIndex()
+
+async def destination_filter(db: AsyncSession, destination: str):
+    """Build (criterion, relevance) expressions for a destination search.
+
+    PostgreSQL uses the pg_trgm GIN indexes declared on Service for both the
+    ILIKE substring match and the word-similarity typo match. Other databases
+    resolve matches through the in-process trigram index.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        pattern = f"%{destination}%"
+        exact = or_(
+            Service.location.ilike(pattern),
+            Service.city.ilike(pattern),
+            Service.state.ilike(pattern)
+        )
+        fuzzy = or_(
+            literal(destination).op("<%")(Service.location),
+            literal(destination).op("<%")(Service.city),
+            literal(destination).op("<%")(Service.state)
+        )
+        relevance = case((exact, EXACT_MATCH), else_=FUZZY_MATCH)
+        return or_(exact, fuzzy), relevance
+
+    await service_index.ensure_loaded(db)
+    matches = service_index.search(destination)
+    if not matches:
+        return false(), literal(FUZZY_MATCH)
+
+    # Every match goes back to SQL, so filters, rating order and paging apply to all of them
+    exact_ids = [service_id for service_id, tier in matches.items() if tier == EXACT_MATCH]
+    relevance = case((_id_in(exact_ids), EXACT_MATCH), else_=FUZZY_MATCH) if exact_ids else literal(FUZZY_MATCH)
+    return _id_in(matches), relevance
+
+def _id_in(ids: Iterable[int]):
+    """Service.id IN a JSON array: one bind parameter however many ids matched"""
+    each = func.json_each(json.dumps(sorted(ids))).table_valued("value")
+    return Service.id.in_(select(each.c.value))
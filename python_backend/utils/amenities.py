@@ -0,0 +1,42 @@
+
+import json
+from typing import List, Optional
+
+# Common spellings folded onto one searchable tag
+AMENITY_ALIASES = {
+    "wi-fi": "wifi",
+    "free wifi": "wifi",
+    "air conditioning": "ac",
+    "air conditioned": "ac",
+    "a/c": "ac",
+    "swimming pool": "pool",
+    "free parking": "parking",
+    "charging point": "charging",
+    "usb charging": "charging",
+}
+
+def normalize_amenity(name: str) -> str:
+    name = " ".join(str(name).lower().split())
+    return AMENITY_ALIASES.get(name, name)
+
+def parse_amenity_list(value: Optional[str]) -> List[str]:
+    """Split a comma-separated amenity filter into normalized tags"""
+    return sorted({normalize_amenity(part) for part in (value or "").split(",") if part.strip()})
+
+def amenity_tags(amenities: Optional[str]) -> List[str]:
+    """Normalized tags for services.amenity_tags from the stored amenities text.
+
+    The text is usually a JSON list, but plain comma-separated values are
+    accepted too so older rows still get tags.
+    """
+    if not amenities:
+        return []
+    try:
+        names = json.loads(amenities)
+    except ValueError:
+        names = amenities.split(",")
+    if isinstance(names, str):
+        names = [names]
+    if not isinstance(names, list):
+        return []
+    return sorted({normalize_amenity(name) for name in names if str(name).strip()})
@@ -0,0 +1,66 @@
+
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open"""
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then probe again after a cool-down.
+
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open once `recovery_timeout` seconds have passed, letting a
+    single trial call through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = "half-open"
+        if self.state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"Circuit '{self.name}' opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    async def call(self, func, *args, is_failure=lambda exc: True, **kwargs):
+        """Await func(*args, **kwargs) through the breaker"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            if is_failure(exc):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelled (client gone, timeout): no verdict on the dependency,
+            # but free the probe slot so the next call can try again
+            self._probing = False
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,83 @@
+
+import math
+from typing import List
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# Stored precision; 12 characters is a few centimetres
+MAX_PRECISION = 12
+
+def encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    """Standard geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+def cell_size(precision: int):
+    """(height, width) of a geohash cell in degrees"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """Geohash prefixes whose cells together cover a circle around a point.
+
+    Picks the finest precision whose cells are at least as large as the
+    radius, then returns the centre cell and its neighbours (at most 9).
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    precision = 1
+    while precision < MAX_PRECISION:
+        height, width = cell_size(precision + 1)
+        if height < dlat or width < dlng:
+            break
+        precision += 1
+    if precision == 1:
+        height, width = cell_size(1)
+        if height < dlat or width < dlng:
+            # Larger than a top-level cell: every cell qualifies
+            return list(BASE32)
+
+    height, width = cell_size(precision)
+    cells = set()
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            lat = min(max(latitude + dy * height, -89.999999), 89.999999)
+            lng = (longitude + dx * width + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every geohash starting with `prefix`"""
+    # '{' sorts right after 'z', the last base32 character
+    return prefix + "{"
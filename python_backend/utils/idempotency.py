@@ -0,0 +1,69 @@
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+class StoredResponse:
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+class IdempotencyEntry:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.response: Optional[StoredResponse] = None
+        self.expires_at = 0.0
+        self.done = asyncio.Event()
+
+    @property
+    def in_flight(self) -> bool:
+        return not self.done.is_set()
+
+class IdempotencyStore:
+    """Size-bounded store of in-flight and completed requests per idempotency key.
+
+    In-flight entries are never evicted, so duplicates always find the
+    execution they should wait for; completed ones expire after `ttl`.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, IdempotencyEntry]" = OrderedDict()
+
+    def begin(self, key: Hashable, fingerprint: str) -> Tuple[IdempotencyEntry, bool]:
+        """Return (entry, True) if the caller should execute, or the existing entry"""
+        entry = self._entries.get(key)
+        if entry is not None and not entry.in_flight and entry.expires_at < time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            return entry, False
+        entry = self._entries[key] = IdempotencyEntry(fingerprint)
+        self._evict()
+        return entry, True
+
+    def complete(self, entry: IdempotencyEntry, response: StoredResponse):
+        entry.response = response
+        entry.expires_at = time.monotonic() + self.ttl
+        entry.done.set()
+
+    def discard(self, key: Hashable, entry: IdempotencyEntry):
+        """Forget a failed execution so the next attempt runs it again"""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+
+    def _evict(self):
+        if len(self._entries) <= self.max_size:
+            return
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if not entry.in_flight]:
+            if len(self._entries) <= self.max_size and self._entries[key].expires_at >= now:
+                break
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
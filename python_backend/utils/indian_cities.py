@@ -0,0 +1,15 @@
+
+# Cities served by TravelGo; service creation and city search are validated against this list
+INDIAN_CITIES = [
+    "Agra", "Ahmedabad", "Ajmer", "Alappuzha", "Amritsar", "Aurangabad",
+    "Bengaluru", "Bhopal", "Bhubaneswar", "Chandigarh", "Chennai", "Coimbatore",
+    "Darjeeling", "Dehradun", "Delhi", "Gangtok", "Goa", "Guwahati",
+    "Gwalior", "Haridwar", "Hyderabad", "Indore", "Jaipur", "Jaisalmer",
+    "Jammu", "Jodhpur", "Kanpur", "Kochi", "Kodaikanal", "Kolkata",
+    "Kozhikode", "Leh", "Lucknow", "Madurai", "Manali", "Mangaluru",
+    "Mount Abu", "Mumbai", "Munnar", "Mysuru", "Nagpur", "Nainital",
+    "Nashik", "Ooty", "Patna", "Puducherry", "Pune", "Puri",
+    "Pushkar", "Raipur", "Rajkot", "Ranchi", "Rishikesh", "Shillong",
+    "Shimla", "Srinagar", "Surat", "Thiruvananthapuram", "Tirupati", "Udaipur",
+    "Vadodara", "Varanasi", "Visakhapatnam",
+]
@@ -0,0 +1,106 @@
+
+import asyncio
+import time
+from typing import NamedTuple, Tuple
+from utils.ttl_cache import TTLCache
+
+class Budget(NamedTuple):
+    """Token bucket refilling `rate` tokens per second up to `burst`"""
+    name: str
+    rate: float
+    burst: int
+
+class MemoryBucketStore:
+    """Token buckets held per worker.
+
+    Idle buckets are evicted once they would have refilled completely,
+    which is the same as starting fresh, so memory tracks active clients.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets = TTLCache(max_size=max_keys, ttl=3600)
+
+    async def take(self, key: str, budget: Budget, cost: float = 1) -> Tuple[bool, float]:
+        """(allowed, seconds until enough tokens are available)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (budget.burst, now))
+        tokens = min(budget.burst, tokens + (now - updated) * budget.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets.set(key, (tokens, now), ttl=(budget.burst - tokens) / budget.rate + 1)
+        return allowed, 0.0 if allowed else (cost - tokens) / budget.rate
+
+# Same refill logic as MemoryBucketStore, run atomically inside Redis
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(retry)}
+"""
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis (needs the redis package)"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(_REDIS_TAKE)
+        self.prefix = prefix
+
+    async def take(self, key: str, budget: Budget, cost: float = 1) -> Tuple[bool, float]:
+        allowed, retry_after = await self._take(
+            keys=[self.prefix + key],
+            args=[budget.rate, budget.burst, time.time(), cost]
+        )
+        return bool(allowed), float(retry_after)
+
+    async def close(self):
+        await self._client.aclose()
+
+class AdmissionLimiter:
+    """Caps in-flight requests; a few may wait briefly, the rest are shed"""
+
+    def __init__(self, limit: int, max_waiting: int, timeout: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self._slots.release()
@@ -0,0 +1,29 @@
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Sequence, Type
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(value):
+    # Match Pydantic's JSON output for Decimal fields
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, Decimal-safe"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def projection(model, schema: Type[BaseModel]) -> List:
+    """Columns of `model` needed to render `schema`, in field order"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+def rows_to_dicts(rows: Iterable[Sequence], keys: Sequence[str]) -> List[Dict]:
+    """Turn projected rows into response dicts, skipping per-row model validation"""
+    return [dict(zip(keys, row)) for row in rows]